@@ -0,0 +1,28 @@
+# micro-benchmark of the index labels against the strings they replace: dict
+# lookups and equality, as done by the interning tables and the Wick engine.
+# Run with python benchmarks/labels.py
+from timeit import repeat
+from giancarlo import Label
+
+names = [f'a_{{{i}}}' for i in range(64)]
+labels = [Label(n) for n in names]
+copies = [''.join(n) for n in names]
+
+def lookup(keys, table):
+    for k in keys:
+        table[k]
+
+def equal(a, b):
+    for x, y in zip(a, b):
+        x == y
+
+by_name, by_label = dict.fromkeys(names), dict.fromkeys(labels)
+cases = {
+    'dict lookup': (lambda: lookup(copies, by_name), lambda: lookup(labels, by_label)),
+    'equality': (lambda: equal(names, copies), lambda: equal(labels, list(labels))),
+}
+
+for case, (strings, interned) in cases.items():
+    s = min(repeat(strings, number=2000, repeat=5))
+    l = min(repeat(interned, number=2000, repeat=5))
+    print(f'{case:12s} str {s * 1e3:7.2f} ms  Label {l * 1e3:7.2f} ms  ratio {s / l:.2f}')
@@ -0,0 +1,21 @@
+# timing of the contractions of phi^4 at third order with and without orbits.
+# Run with python benchmarks/orbits.py
+from time import perf_counter
+import giancarlo as gc
+
+phi = gc.RealScalarField(r'\phi')
+
+def phi4(z):
+    return phi(z) * phi(z) * phi(z) * phi(z)
+
+expr = phi('x') * phi('y') * phi4('z1') * phi4('z2') * phi4('z3')
+
+for orbits in (True, False):
+    start = perf_counter()
+    n = len(expr.wick(orbits=orbits, fixed=['x', 'y']))
+    print(f'wick orbits={orbits!s:5s} {n:6d} terms {perf_counter() - start:8.3f} s')
+
+for orbits in (True, False):
+    start = perf_counter()
+    n = len(gc.perturbative(phi('x') * phi('y'), phi4, 3, orbits=orbits))
+    print(f'perturbative orbits={orbits!s:5s} {n:6d} terms {perf_counter() - start:8.3f} s')
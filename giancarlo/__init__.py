@@ -18,48 +18,66 @@ from .algebra import *
 from .qft import *
 from .utils import *
 from .draw import *
+from .topology import *
+from .table import *
+from .disk import *
+from .dirac import *
+from .color import *
+from .symmetry import *
+from .correlator import *
+from .perturbation import *
+from .checkpoint import *
 
 __all__.extend(algebra.__all__)
 __all__.extend(qft.__all__)
 __all__.extend(utils.__all__)
 __all__.extend(draw.__all__)
+__all__.extend(topology.__all__)
+__all__.extend(table.__all__)
+__all__.extend(disk.__all__)
+__all__.extend(dirac.__all__)
+__all__.extend(color.__all__)
+__all__.extend(symmetry.__all__)
+__all__.extend(correlator.__all__)
+__all__.extend(perturbation.__all__)
+__all__.extend(checkpoint.__all__)
 
-def RealScalarField(flavor):
-    id = default.new()
+def RealScalarField(flavor, ns=None):
+    id = (ns or default).new()
     def phi(pos):
         return RealField(id, flavor, {'pos': pos})
     return phi
   
-def ComplexScalarField(flavor):
-    id = default.new()
+def ComplexScalarField(flavor, ns=None):
+    id = (ns or default).new()
     def phi(pos):
         return ComplexField(id, flavor, False, True, {'pos': pos})
     def phidag(pos):
         return ComplexField(id, rf'{{{flavor}}}^\dagger', True, True, {'pos': pos})
     return phi, phidag
 
-def PhotonField():
-    id = default.new()
+def PhotonField(ns=None):
+    id = (ns or default).new()
     def A(pos, mu):
         return RealField(id, 'A', {'pos': pos, 'lorentz': mu}, linestyle='squiggle')
     return A
 
-def SpinorField(flavor):
-    id = default.new()
+def SpinorField(flavor, ns=None):
+    id = (ns or default).new()
     def psi(pos, spin):
         return ComplexField(id, flavor, False, False, {'pos': pos, 'spin': spin})
     def psibar(pos, spin):
         return ComplexField(id, rf'\bar{{{flavor}}}', True, False, {'pos': pos, 'spin': spin})
     return psi, psibar
 
-def QuarkField(flavor):
-    id = default.new()
+def QuarkField(flavor, ns=None):
+    id = (ns or default).new()
     def psi(pos, spin, color):
         return ComplexField(id, flavor, False, False, {'pos': pos, 'spin': spin, 'color': color})
     def psibar(pos, spin, color):
         return ComplexField(id, rf'\bar{{{flavor}}}', True, False, {'pos': pos, 'spin': spin, 'color': color})
     return psi, psibar
 
-def DiracGamma(mu, a, b):
-    id = default.new()
+def DiracGamma(mu, a, b, ns=None):
+    id = (ns or default).new()
     return ComplexField(id, 'G', False, True, {'lorentz': mu, 'spin': a}) * ComplexField(id, 'G', True, True, {'lorentz': mu, 'spin': b})
\ No newline at end of file
@@ -12,14 +12,22 @@
 # GNU General Public License for more details.
 #
 
-from copy import deepcopy
+from weakref import WeakValueDictionary
+from concurrent.futures import ProcessPoolExecutor
 from itertools import permutations, combinations
+from fractions import Fraction
+from numbers import Number, Rational
 import math
+import os
+import sys
+import threading
 
 # from .utils import *
 from .wick import *
 from .draw import *
-from .utils import default
+from .topology import Topology
+from .table import FieldTable
+from .utils import default, print
 
 __all__ = [
     "Base",
@@ -28,24 +36,43 @@ __all__ = [
     "ExchangeSymmetry"
 ]
 
+class Interned(type):
+    # hash-consing: nodes are immutable and each distinct node is built only
+    # once, equal nodes are the same object
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls.table = WeakValueDictionary()
+        cls.lock = threading.Lock()
+
+    def __call__(cls, *args, **kwargs):
+        key = cls.key(*args, **kwargs)
+        try:
+            with cls.lock:
+                node = cls.table.get(key)
+        except TypeError:
+            # unhashable indices, the node is not shared
+            return super().__call__(*args, **kwargs)
+        if node is None:
+            # built outside the lock, the arguments may be interned nodes too;
+            # of two threads building the same node the first one stored wins
+            node = super().__call__(*args, **kwargs)
+            # nodes may bring their arguments in canonical form
+            canonical = cls.key(*node.__reduce__()[1])
+            with cls.lock:
+                node = cls.table.setdefault(canonical, node)
+                node = cls.table.setdefault(key, node)
+        return node
+
+
 class Base:           
-    def wick(self):
+    def wick(self, *args, **kwargs):
         return self
 
     def _replace(self, rdict):
-        pass
+        return self
 
     def replace(self, rdict):
-        def inner(x):
-            if hasattr(x, "factors"):
-                for f in x.factors:
-                    inner(f)
-            else:
-                x._replace(rdict)
-
-        _expr = deepcopy(self)
-        inner(_expr)
-        return _expr
+        return self._replace(rdict)
         
     def tolist(self, ctype):
         return self.factors if isinstance(self, ctype) else [self] 
@@ -65,10 +92,18 @@ class Base:
         return self + CNumber(-1) * other #.tolist(Sum)
     
     def __pow__(self, n):
-        out = self
-        for _ in range(1,n):
-            out *= self
-        return out
+        # exponentiation by squaring, intermediate sums are merged at every step
+        if n < 1:
+            return CNumber(1)
+        out = None
+        base = self
+        while True:
+            if n & 1:
+                out = base if out is None else out * base
+            n >>= 1
+            if not n:
+                return out
+            base = base * base
 
     def __len__(self):
         if hasattr(self, "factors"):
@@ -78,6 +113,23 @@ class Base:
     
     ####
 
+    def render(self, hide=(), latex=None):
+        # strings of immutable nodes (those with a strings dict) are built once
+        # per set of hidden indices; indices switched off in default.verbose are
+        # always hidden
+        hide = hidden(hide)
+        latex = default.latex if latex is None else latex
+        cache = self.__dict__.get('strings')
+        if cache is None:
+            return self.format(hide, latex)
+        key = (hide, latex)
+        if not key in cache:
+            cache[key] = self.format(hide, latex)
+        return cache[key]
+
+    def format(self, hide, latex):
+        return self.__str__()
+
     def __repr__(self):
         return self.__str__()
 
@@ -93,34 +145,59 @@ class Base:
     def draw(self):
         pass
 
+    def diagram(self, title=''):
+        return [], self._repr_latex_() if title=='' else title
+
     @property
     def sign(self):
         if hasattr(self, "boson"):
             return 1 if self.boson else -1
         return 1
 
+def hidden(hide=()):
+    return frozenset(hide).union(key for key, on in default.verbose.items() if not on)
+
+def signed(term, hide=(), latex=None):
+    # a unit number renders as its sign only, the 1 is put back
+    s = term.render(hide, latex)
+    s = s + '1' if s in ('', '-') else s
+    return s if term.is_negative() else '+' + s
+
+def write(terms, file=None, latex=None, hide=()):
+    # streams terms one per line to a path or a file object (stdout by default),
+    # the string of the whole sum is never assembled; returns the number of terms
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'w') as f:
+            return write(terms, f, latex, hide)
+    file = sys.stdout if file is None else file
+    latex = default.latex if latex is None else latex
+    n = 0
+    file.write('\\begin{align*}\n' if latex else '')
+    for t in terms:
+        file.write(f'& {signed(t, hide, latex)} \\\\\n' if latex else f'{signed(t, hide, latex)}\n')
+        n += 1
+    file.write('\\end{align*}\n' if latex else '' if n else '0\n')
+    return n
+
 class Product(Base):
     def __init__(self, factors = []):
-        # flattens products of products
-        _factors = []
-        for f in factors:
-            if isinstance(f, Product):
-                _factors.extend(f.factors)
-            else:
-                _factors.append(f)
-
-        # cnumber first, symbols second
+        # cnumber first, symbols second, products are flattened
         cs = []
         ss = []
-        ps = Sum()
+        ps = []
         rs = []
-        for f in _factors:
-            if isinstance(f, CNumber):
+        for f in factors:
+            if isinstance(f, Product):
+                cs.extend(f.cnum)
+                ss.extend(f.symb)
+                ps.extend(f.sum)
+                rs.extend(f.data)
+            elif isinstance(f, CNumber):
                 cs.append(f)
             elif isinstance(f, Symbol):
                 ss.append(f)
             elif isinstance(f, Sum):
-                ps += f
+                ps.append(f)
             else:
                 rs.append(f)
         
@@ -132,9 +209,55 @@ class Product(Base):
             self.data = []
         else:
             self.symb = Symbol.reduce(ss)
-            self.sum = [ps] if len(ps)>0 else []
+            self.sum = Product.reduce_sums(ps)
             self.data = rs
 
+    @classmethod
+    def from_parts(cls, cnum, symb, sum, data):
+        # parts are assumed to be already reduced
+        obj = object.__new__(cls)
+        obj.cnum = cnum
+        obj.symb = symb
+        obj.sum = sum
+        obj.data = data
+        return obj
+
+    @classmethod
+    def from_factors(cls, factors):
+        # same result as multiplying all factors in order with *, built in a single pass
+        groups = [[]]
+        for f in factors:
+            if isinstance(f, Sum):
+                groups = [g + [t] for g in groups for t in f.factors]
+            else:
+                for g in groups:
+                    g.append(f)
+        if len(groups) == 1:
+            return cls(groups[0])
+        return Sum.from_terms(cls(g) for g in groups)
+
+    def reduce_sums(sums: list) -> list:
+        if not sums:
+            return []
+        ps = Sum(sums)
+        return [ps] if len(ps)>0 else []
+
+    def __matmul__(self, other):
+        if not isinstance(other, Product):
+            return Product([self, other])
+        cnum = CNumber.reduce(self.cnum + other.cnum)
+        if cnum and cnum[0].numerator == 0:
+            return Product.from_parts(cnum, [], [], [])
+        if self.symb and other.symb:
+            symb = Symbol.reduce(self.symb + other.symb)
+        else:
+            symb = self.symb or other.symb
+        if self.sum and other.sum:
+            sum = Product.reduce_sums(self.sum + other.sum)
+        else:
+            sum = self.sum or other.sum
+        return Product.from_parts(cnum, symb, sum, self.data + other.data)
+
     @property
     def factors(self):
         return self.cnum + self.symb + self.sum + self.data
@@ -147,42 +270,82 @@ class Product(Base):
     def size(self):
         return len(self.factors)
     
-    def __str__(self, latex=default.latex):
-        if latex:
-            return r"\,".join(map(str, self.factors))
-        return " * ".join(map(str, self.factors))
+    def __str__(self):
+        return self.render()
+
+    def format(self, hide, latex):
+        return Product.join(self.factors, latex, hide)
+
+    def join(factors, latex=None, hide=()):
+        latex = default.latex if latex is None else latex
+        return (r"\," if latex else " * ").join(f.render(hide, latex) for f in factors)
     
     def is_negative(self):
         if self.cnum:
             return self.cnum[0].negative
         return False
 
-    def wick(self):
-        terms = []
-        for c in wick_fields_fast(self.data):
+    def table(self):
+        # only fields enter the Wick engine
+        return FieldTable([f for f in self.data if hasattr(f, 'can_be_contracted')])
+
+    def wick_terms(self, orbits=False, fixed=(), stack=None):
+        # terms are generated one at a time, factors that are not fields (color
+        # tensors, propagators) are kept in every term. With orbits only one
+        # contraction per orbit of the symmetries of the product is built, with
+        # the coefficient of the whole orbit; labels in fixed are never exchanged
+        table = self.table()
+        others = [f for f in self.data if not hasattr(f, 'can_be_contracted')]
+        reduce = None
+        if any(getattr(f, 'color_tensor', False) for f in others):
+            from .color import reduce_color as reduce
+        orbit = None
+        stream = wick_stream(table, stack=stack)
+        if orbits:
+            from .symmetry import Orbits, classes
+            groups = classes(table.fields)
+            orbit = Orbits(table, groups, others, fixed)
+            stream = wick_classes(table, groups, stack)
+        for pairs, sign in stream:
+            if orbit is not None:
+                sign = orbit(pairs, sign)
+                if not sign:
+                    continue
+            c = Contraction(table.fields, pairs, sign)
             if 'wick' in default.debug:
                 log.debug(f' wick : {c}')
-            terms.append(CNumber(c.sign) * self.prefactor * Product(c()))
-        return Sum(terms)
+            term = CNumber(c.sign) * self.prefactor * Product(others + c())
+            yield term if reduce is None else reduce(term)
+
+    def wick(self, orbits=False, fixed=(), checkpoint=None, budget=None):
+        if checkpoint is not None or budget is not None:
+            from .checkpoint import wick
+            return wick(self, orbits, fixed, checkpoint, budget)
+        return Sum(list(self.wick_terms(orbits, fixed)))
+
+    def symmetries(self, fixed=()):
+        # label permutations mapping the product onto itself, to be used in simplify
+        from .symmetry import LabelSymmetry, automorphisms
+        out = []
+        for _, mapping in automorphisms(self.data, fixed):
+            s = LabelSymmetry(mapping)
+            if mapping and not s in out:
+                out.append(s)
+        return out
     
-    def draw(self, title=''):
-        # remove prefactors
-        _data = [f for f in self.factors if not isinstance(f, (Sum, CNumber, Symbol))]
-        # remove tensorproducts
-        _no_tp = []
-        for f in _data:
-            if isinstance(f, ContractedProduct):
-                _no_tp.extend(f.factors)
-            else:
-                _no_tp.append(f)
-        # keep only physical propagators
-        _props = [p for p in _no_tp if p['pos']!=(None,None)]
-        connected = topologies(Product(_props)) #, 'pos')
+    def topology(self):
+        return Topology(self)
+
+    def reduce_gammas(self):
+        from .dirac import reduce_gammas
+        return reduce_gammas(self)
 
-        g = Diagram(len(connected))
-        for i, conn in enumerate(connected):
-            g.draw_connected_diagram(i, conn)
-        g(self._repr_latex_() if title=='' else title)
+    def diagram(self, title=''):
+        return self.topology().diagram(), self._repr_latex_() if title=='' else title
+
+    def draw(self, title=''):
+        connected, title = self.diagram(title)
+        Diagram(len(connected)).draw(connected, title)
 
     # def trace(self, indices = []):
     #     result = self.prefactor
@@ -190,13 +353,22 @@ class Product(Base):
     #         result *= Trace(factors, indices) if closed else Product(factors)
     #     return result
 
-    def contract(self, index):
-        if not index:
+    def _replace(self, rdict):
+        return Product.from_parts(
+            self.cnum, self.symb,
+            [f._replace(rdict) for f in self.sum],
+            [f._replace(rdict) for f in self.data]
+        )
+
+    def contract(self, *indices):
+        data = self.data
+        for index in indices:
+            # nothing to contract if no factor carries the index
+            if index and any(tuple(f[index]) != (None, None) for f in data):
+                data = [ContractedProduct(factors, index) for factors in split_connected(Product(data), index)]
+        if data is self.data:
             return self
-        result = self.prefactor
-        for factors in split_connected(Product(self.data), index):
-            result *= ContractedProduct(factors, index)
-        return result
+        return Product.from_parts(self.cnum, self.symb, self.sum, data)
 
     def permutations(self):
         assert sum([f.sign for f in self.factors]) == len(self.factors)
@@ -204,21 +376,19 @@ class Product(Base):
             yield Product(list(p))
 
     def __contains__(self, other):
-        A = other.cyclic_permutations() if isinstance(other, ContractedProduct) else [str(other)]
-        B = [str(f) for f in self.factors]
-        return bool(set(A) & set(B))    
+        # traces are stored in canonical form, a single key comparison is enough
+        key = str(other)
+        return any(str(f) == key for f in self.factors)
 
-class ContractedProduct(Base):
+class ContractedProduct(Base, metaclass=Interned):
     def __init__(self, factors: list, index):
         self.factors = list(factors)
         self.index = index
-        a, b = None, None
-        for f in factors:
-            if not f[index][0] is None:
-                if a is None:
-                    a = f[index][0]
-            if not f[index][1] is None:
-                b = f[index][1] 
+        self.strings = {}
+        a, b = self.ends()
+        if a==b and not a is None:
+            self.factors = self.canonical()
+            a, b = self.ends()
         self.open_indices = (a, b)
         if a==b:
             if not a is None:
@@ -230,163 +400,339 @@ class ContractedProduct(Base):
             self.repr_0 = rf'\big['
             self.repr_1 = rf' \big]({a},{b})'
 
+    def ends(self):
+        a, b = None, None
+        for f in self.factors:
+            if not f[self.index][0] is None:
+                if a is None:
+                    a = f[self.index][0]
+            if not f[self.index][1] is None:
+                b = f[self.index][1] 
+        return a, b
+
+    def keys(self, factors):
+        hide = (self.index,)
+        return [f.render(hide) for f in factors]
+
+    def canonical(self):
+        # closed traces are stored in the lexicographically minimal rotation of the
+        # factors, rendered without the traced index; traces of symmetric factors
+        # are also compared with their reflection
+        keys = self.keys(self.factors)
+        k = least_rotation(keys)
+        factors, keys = self.factors[k:] + self.factors[:k], keys[k:] + keys[:k]
+        if all(getattr(f, 'symmetric', False) for f in self.factors):
+            reflected = [f.swap() for f in reversed(self.factors)]
+            rkeys = self.keys(reflected)
+            k = least_rotation(rkeys)
+            if rkeys[k:] + rkeys[:k] < keys:
+                factors = reflected[k:] + reflected[:k]
+        return factors
+
+    def key(factors, index):
+        return tuple(factors), index
+
+    def __reduce__(self):
+        return ContractedProduct, (self.factors, self.index)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _replace(self, rdict):
+        return ContractedProduct([f._replace(rdict) for f in self.factors], self.index)
+
     def __str__(self):
-        default.verbose[self.index] = False
-        s = str(Product([f.stripe(self.index) for f in self.factors]))
-        default.verbose[self.index] = True
-        return self.repr_0 + s + self.repr_1
+        return self.render()
+
+    def format(self, hide, latex):
+        # the contracted index is not shown inside the brackets
+        return self.repr_0 + Product.join(self.factors, latex, hide | {self.index}) + self.repr_1
 
     def __getitem__(self, idx):
         if idx == self.index:
             return self.open_indices
         conn = split_connected(Product([f for f in self.factors if not f[idx][0] is None]), idx)
+        if not conn:
+            return (None, None)
         if len(conn)==1:
             return conn[0][0][idx][0], conn[0][-1][idx][1]
         raise Exception(f'Did not manage to connect all indices of type {idx}')
     
     def swap(self):
-        pass
+        return self
 
     def stripe(self, index):
         return self
 
-    def cyclic_permutations(self):
-        a, b = self.open_indices
-        if a == b:
-            return [str(ContractedProduct(self.factors[i:] + self.factors[:i], self.index)) for i in range(len(self.factors))]
-        return [str(self)]
-    
 class Sum(Base):
     def __init__(self, factors = []):
-        _factors = []
+        # sums are flattened, identical terms are merged
+        count = Counter()
         for f in factors:
             if isinstance(f, Sum):
-                _factors.extend(f.factors)
+                for g in f.factors:
+                    count(g)
             else:
-                _factors.append(f)
-
-        count = Counter()
-        for f in _factors:
-            count(f)
+                count(f)
 
         self.factors = []
-        for f in count.unique():
-            if count[f]==0.0:
+        for f, c in count.items():
+            if c == 0:
                 continue
-            elif count[f]==1.0:
+            elif c == 1:
                 self.factors.append(f if isinstance(f, Product) else Product([f]))
+            elif isinstance(f, Product):
+                self.factors.append(Product.from_parts([c], f.symb, f.sum, f.data))
             else:
-                self.factors.append(count[f] * f)
+                self.factors.append(Product([c, f]))
+
+        # index of canonical classes, set by simplify
+        self.simplifier = None
 
+    @classmethod
+    def from_terms(cls, terms):
+        # single pass over any iterable of terms, instead of chaining +
+        return cls(terms)
 
     def __str__(self):
+        return self.render()
+
+    def format(self, hide, latex):
         if not self.factors:
             return "0"
-        func = lambda f: str(f) if f.is_negative() else '+'+str(f)
-        return f"( {''.join(map(func, self.factors))} )"
+        return f"( {''.join(signed(f, hide, latex) for f in self.factors)} )"
+
+    def write(self, file=None, latex=None, hide=()):
+        return write(self.factors, file, latex, hide)
 
     def __mul__(self, other):
         if isinstance(other, Sum):
             return Sum([f1 * f2 for f1 in self.factors for f2 in other.factors])
         return Sum([f * other for f in self.factors])
 
-    def simplify(self, *args):
-        data = {}
-        
-        symmetries = [IdentitySymmetry()]# if not any(isinstance(x, IdentitySymmetry) for x in args) else []
-        symmetries.extend(list(args))
+    def simplify(self, *args, workers=None, hermiticity=False, checkpoint=None, budget=None):
+        # already simplified under the same symmetries
+        if self.simplifier is not None and self.simplifier.same(args, hermiticity):
+            return self
 
-        symmetries_combined = [
-            GenericSymmetry(combo)
-            for r in range(1, len(symmetries) + 1)
-            for combo in combinations(symmetries, r)
-        ]
+        if checkpoint is not None or budget is not None:
+            from .checkpoint import simplify
+            return simplify(self, args, hermiticity, checkpoint, budget)
 
-        def add_to_data(p, expr: Product):
-            for k, (_, d) in data.items():
-                for s in symmetries_combined:
-                    count = 0
-                    for element in d.factors:
-                        if s(element) in expr:
-                            count += 1
-                    if count == len(d):
-                        data[k][0] += p
-                        return
-
-            k = str(expr)
-            data[k] = [p, expr]
-            return
-        
-        for f in self.factors:
-            p, d = f.prefactor, Product(f.data)
-            add_to_data(p, d)
+        # terms can only merge within a bucket of equal invariants, buckets are
+        # merged independently, in a process pool if workers > 1
+        groups = buckets(self, hermiticity)
+        if workers is None or workers < 2 or len(groups) < 2:
+            classes = [merge_bucket(b, args, hermiticity) for b in groups]
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                classes = list(pool.map(merge_bucket, groups, [args] * len(groups), [hermiticity] * len(groups)))
+        return assemble(classes, args, hermiticity)
 
-        if 'simplify' in default.debug:
-            for key in data:
-                log.debug(f'( {data[key][0]} ) * ( {data[key][1]} )')
+    def merges_with(self, other):
+        return isinstance(other, Sum) and self.simplifier is not None and other.simplifier is not None \
+            and self.simplifier.same(other.simplifier.symmetries, other.simplifier.hermiticity)
 
-        return Sum([data[key][0] @ data[key][1] for key in data if data[key][0].factors])
-    
-    def wick(self):
-        return Sum([f.wick() for f in self.factors])
+    def merge(self, other, c=None):
+        # incremental simplify of self + c * other, only the classes of other are added
+        simplifier = self.simplifier.copy()
+        for p, d in other.simplifier.data.values():
+            simplifier.add(p if c is None else c * p, d)
+        return simplifier()
 
-    def contract(self, index):
-        return Sum([f.contract(index) for f in self.factors])
+    def __add__(self, other):
+        if self.merges_with(other):
+            return self.merge(other)
+        return super().__add__(other)
+
+    def __sub__(self, other):
+        if self.merges_with(other):
+            return self.merge(other, CNumber(-1))
+        return super().__sub__(other)
+
+    def _replace(self, rdict):
+        # terms are not merged, the index of canonical classes is dropped
+        out = Sum()
+        out.factors = [f._replace(rdict) for f in self.factors]
+        return out
+    
+    def wick(self, orbits=False, fixed=(), checkpoint=None, budget=None):
+        if checkpoint is not None or budget is not None:
+            from .checkpoint import wick
+            return wick(self, orbits, fixed, checkpoint, budget)
+        return Sum([f.wick(orbits, fixed) for f in self.factors])
+
+    def contract(self, *indices):
+        return Sum([f.contract(*indices) for f in self.factors])
     
     def trace(self, indices = []):
         return Sum([f.trace(indices) for f in self.factors])
     
+    def topologies(self):
+        return [Topology(f).label for f in self.factors]
+
     def elements(self):
         for f in self.factors:
             yield f
 
-    def draw(self):
-        for f in self.factors:
-            f.draw()
+    def reduce_gammas(self):
+        from .dirac import reduce_gammas
+        return reduce_gammas(self)
+
+    def spill(self, path=None, **kwargs):
+        from .disk import DiskSum
+        return DiskSum(path, **kwargs).extend(self.factors)
+
+    def unique_topologies(self):
+        return Topology.unique(self.factors)
+
+    def report(self):
+        for i, u in enumerate(self.unique_topologies()):
+            print(f'[{i}] {u}')
+
+    def draw(self, filename=None, unique=False, **kwargs):
+        # with a filename all diagrams are rendered headless on paged grids,
+        # see draw.render for the options; unique draws every topology once
+        items = self.unique_topologies() if unique else self.factors
+        if filename is None:
+            for f in items:
+                f.draw()
+            return
+        return render([f.diagram() for f in items], filename, **kwargs)
 
     
+def snap_int(x, tol=1e-12):
+    if math.isclose(x, round(x), abs_tol=tol):
+        return int(round(x))
+    return x
+
+
 class CNumber(Base):
-    def __init__(self, numerator, denominator=1):
-        def snap_int(x, tol=1e-12):
-            if math.isclose(x, round(x), abs_tol=tol):
-                return int(round(x))
-            return x
-        
-        if isinstance(numerator,int) and isinstance(denominator, int):
-            gcd = math.gcd(numerator, denominator)
-            self.numerator = numerator // gcd
-            self.denominator = denominator // gcd
-        else:
-            for key in ['numerator', 'denominator']:
-                number = locals()[key]
-                if isinstance(number, complex):
-                    setattr(self, key, number.real if number.imag==0.0 else number)
-                else:
-                    setattr(self, key, snap_int(number))
-
-        if isinstance(self.numerator, complex):
-            self.negative = False
-        else:
-            self.negative = self.numerator * self.denominator < 0
+    # exact values are kept as a reduced pair of ints, inexact ones (float or complex)
+    # are stored in the numerator with a unit denominator
+    interned = {}
+
+    def __new__(cls, numerator=1, denominator=1):
+        if type(numerator) is int and type(denominator) is int:
+            if denominator != 1:
+                if denominator == 0:
+                    raise ZeroDivisionError(f'CNumber({numerator}, 0)')
+                if denominator < 0:
+                    numerator, denominator = -numerator, -denominator
+                g = math.gcd(numerator, denominator)
+                if g != 1:
+                    numerator //= g
+                    denominator //= g
+            return cls.exact(numerator, denominator)
+        if isinstance(numerator, Rational) and isinstance(denominator, Rational):
+            q = Fraction(numerator, denominator)
+            return cls.exact(q.numerator, q.denominator)
+        return cls.inexact(numerator if denominator == 1 else numerator / denominator)
+
+    @classmethod
+    def exact(cls, numerator, denominator=1):
+        # 0, +-1 and +-1/2 are shared instances
+        if denominator <= 2 and -1 <= numerator <= 1:
+            return cls.interned[numerator, denominator]
+        obj = object.__new__(cls)
+        obj.numerator = numerator
+        obj.denominator = denominator
+        obj.negative = numerator < 0
+        return obj
+
+    @classmethod
+    def inexact(cls, value):
+        if isinstance(value, complex):
+            if value.imag != 0.0:
+                obj = object.__new__(cls)
+                obj.numerator = value
+                obj.denominator = 1
+                obj.negative = False
+                return obj
+            value = value.real
+        value = snap_int(value)
+        if isinstance(value, int):
+            return cls.exact(value)
+        obj = object.__new__(cls)
+        obj.numerator = value
+        obj.denominator = 1
+        obj.negative = value < 0
+        return obj
+
+    @property
+    def is_exact(self):
+        return type(self.numerator) is int
+
+    @property
+    def value(self):
+        if self.denominator == 1:
+            return self.numerator
+        return Fraction(self.numerator, self.denominator)
 
     def __add__(self, other):
-        if isinstance(other, CNumber):
-            return CNumber(self.numerator*other.denominator + self.denominator*other.numerator, self.denominator*other.denominator)
+        if not isinstance(other, Base) and isinstance(other, Number):
+            other = CNumber(other)
+        if type(other) is CNumber:
+            if type(self.numerator) is int and type(other.numerator) is int:
+                if self.denominator == 1 and other.denominator == 1:
+                    return CNumber.exact(self.numerator + other.numerator)
+                return CNumber(self.numerator*other.denominator + self.denominator*other.numerator, self.denominator*other.denominator)
+            return CNumber.inexact(self.value + other.value)
         return super().__add__(other)
     
     def __mul__(self, other):
-        if isinstance(other, CNumber):
-            return CNumber(self.numerator*other.numerator, self.denominator*other.denominator)
+        if not isinstance(other, Base) and isinstance(other, Number):
+            other = CNumber(other)
+        if type(other) is CNumber:
+            if type(self.numerator) is int and type(other.numerator) is int:
+                if self.denominator == 1 and other.denominator == 1:
+                    return CNumber.exact(self.numerator * other.numerator)
+                return CNumber(self.numerator*other.numerator, self.denominator*other.denominator)
+            return CNumber.inexact(self.value * other.value)
         return super().__mul__(other)
-    
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        if type(self.numerator) is int:
+            return CNumber.exact(-self.numerator, self.denominator)
+        return CNumber.inexact(-self.numerator)
+
     def __eq__(self, value):
-        _value = self.numerator/self.denominator
-        return _value == value
-    
+        # by value like the hash, an inexact 0.5 equals the exact 1/2
+        if isinstance(value, CNumber):
+            if self.denominator == value.denominator:
+                return self.numerator == value.numerator
+            return self.value == value.value
+        return self.value == value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __float__(self):
+        return float(self.value)
+
+    def __complex__(self):
+        return complex(self.value)
+
+    # immutable, safe to share between expressions
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (CNumber, (self.numerator, self.denominator))
+
     def __str__(self):
         sign = '-' if self.negative else ''
-        if self.denominator==1.0:
-            if self.numerator in (1.0, -1.0):
+        if self.denominator==1:
+            if self.numerator in (1, -1):
                 return f'{sign}'
             if isinstance(self.numerator, complex):
                 return f'{self.numerator}'
@@ -394,13 +740,17 @@ class CNumber(Base):
         return rf'{sign}\frac{{{abs(self.numerator)}}}{{{self.denominator}}}'
 
     def reduce(cnumbers: list) -> list:
-        if not cnumbers:
-            return []
+        if len(cnumbers) < 2:
+            return cnumbers
         p = cnumbers[0]
         for c in cnumbers[1:]:
             p *= c
         return [p]
 
+for n, d in [(0, 1), (1, 1), (-1, 1), (1, 2), (-1, 2)]:
+    CNumber.interned[n, d] = obj = object.__new__(CNumber)
+    obj.numerator, obj.denominator, obj.negative = n, d, n < 0
+
 
 class Symbol(Base):
     def __init__(self, value: str, pow: int = 1):
@@ -414,23 +764,14 @@ class Symbol(Base):
         return isinstance(other, Symbol) and [self.value, self.pow] == [other.value, other.pow]
     
     def reduce(symbols: list) -> list:
-        if not symbols:
-            return []
+        if len(symbols) < 2:
+            return symbols
         
-        vals = [s.value for s in symbols]
-        pows = [s.pow for s in symbols]
-
-        _vals = []
-        _pows = []
-        for v, p in zip(vals, pows):
-            if v not in _vals:
-                _vals.append(v)
-                _pows.append(p)
-            else:
-                i = _vals.index(v)
-                _pows[i] += p
+        pows = {}
+        for s in symbols:
+            pows[s.value] = pows.get(s.value, 0) + s.pow
 
-        return sorted([Symbol(_v,_p) for _v, _p in zip(_vals, _pows)], key=str)
+        return sorted([Symbol(v, p) for v, p in pows.items()], key=str)
 
 
 class Counter:
@@ -439,18 +780,19 @@ class Counter:
         self.count = {}
 
     def __call__(self, item):
-        f = CNumber(1)
+        f = CNumber.interned[1, 1]
         if isinstance(item, Product):
-            cn, item = item.cnum, Product(item.symb + item.sum + item.data)
-            if cn:
-                f = cn[0]
-                
-        key = str(item)
+            if item.cnum:
+                f = item.cnum[0]
+            key = Product.join(item.symb + item.sum + item.data)
+        else:
+            key = str(item)
+
         if key in self.count:
             self.count[key] += f
         else:
             self.count[key] = f
-            self.data[key] = item
+            self.data[key] = Product.from_parts([], item.symb, item.sum, item.data) if isinstance(item, Product) else item
 
     def __getitem__(self, item):
         key = str(item)
@@ -458,8 +800,122 @@ class Counter:
     
     def unique(self):
         return [self.data[key] for key in self.count]
+
+    def items(self):
+        for key, value in self.count.items():
+            yield self.data[key], value
     
 
+class Simplifier:
+    def __init__(self, symmetries, hermiticity=False):
+        self.symmetries = list(symmetries)
+        self.hermiticity = hermiticity
+
+        # images of canonical quark propagators are brought back to canonical orientation
+        _symmetries = [IdentitySymmetry()] + self.symmetries
+        self.combined = [
+            GenericSymmetry(combo + ((Gamma5Hermiticity(),) if hermiticity else ()))
+            for r in range(1, len(_symmetries) + 1)
+            for combo in combinations(_symmetries, r)
+        ]
+        self.data = {}
+
+    def same(self, symmetries, hermiticity=False):
+        return self.symmetries == list(symmetries) and self.hermiticity == hermiticity
+
+    def add(self, p, expr: Product):
+        # prefactors of terms that were already simplified are a single Sum
+        if isinstance(p, Product) and len(p.sum) == 1 and not (p.cnum or p.symb or p.data):
+            p = p.sum[0]
+        for k, (_, d) in self.data.items():
+            for s in self.combined:
+                count = 0
+                for element in d.factors:
+                    if s(element) in expr:
+                        count += 1
+                if count == len(d):
+                    self.data[k][0] += p
+                    return k
+
+        k = str(expr)
+        self.data[k] = [p, expr]
+        return k
+
+    def copy(self):
+        out = Simplifier.__new__(Simplifier)
+        out.symmetries = self.symmetries
+        out.hermiticity = self.hermiticity
+        out.combined = self.combined
+        out.data = {k: list(v) for k, v in self.data.items()}
+        return out
+
+    def __call__(self):
+        # drop classes whose prefactors cancelled, an empty Product is a unit prefactor
+        out = Sum([p @ d for p, d in self.data.values() if isinstance(p, Product) or p.factors])
+        out.simplifier = self
+        return out
+
+
+def gamma5(f):
+    return getattr(f, 'gamma', False) and str(f['lorentz'][0]) == '5'
+
+def shape(f, hermiticity=False):
+    # what is left of a factor once its labels are forgotten, unchanged by any
+    # relabeling of the indices. With hermiticity the dagger and the g_5 factors
+    # are forgotten too, as the rewrite moves them depending on the orientation
+    if isinstance(f, ContractedProduct):
+        a, b = f.open_indices
+        inner = [shape(g, hermiticity) for g in f.factors if not (hermiticity and gamma5(g))]
+        return ('CP', f.index, a == b, tuple(sorted(inner, key=repr)))
+    if hasattr(f, 'tag'):
+        dagger = None if hermiticity else getattr(f, 'dagger', None)
+        return (type(f).__name__, f.tag, getattr(f, 'anti', None), getattr(f, 'linestyle', None), dagger)
+    return (type(f).__name__, getattr(f, 'kind', None), len(getattr(f, 'labels', ())))
+
+def invariants(data, hermiticity=False):
+    return tuple(sorted((shape(f, hermiticity) for f in data if not (hermiticity and gamma5(f))), key=repr))
+
+def buckets(expr, hermiticity=False):
+    # terms as (position, prefactor, data) grouped by their invariants. With
+    # hermiticity quark propagators are put in canonical orientation, but the
+    # bucket is the one of the term before the rewrite
+    out = {}
+    i = 0
+    for f in expr.factors:
+        key = invariants(Product(f.data).data, hermiticity)
+        if hermiticity:
+            from .dirac import gamma5_hermiticity
+            terms = gamma5_hermiticity(f).tolist(Sum)
+        else:
+            terms = [f]
+        for t in terms:
+            d = Product(t.data)
+            out.setdefault(key, []).append((i, t.prefactor, d))
+            i += 1
+    return list(out.values())
+
+def assemble(classes, symmetries, hermiticity=False):
+    # classes of all the buckets in order of first appearance, as without buckets
+    simplifier = Simplifier(symmetries, hermiticity)
+    for _, k, p, d in sorted((c for b in classes for c in b), key=lambda c: c[0]):
+        simplifier.data[k] = [p, d]
+
+    if 'simplify' in default.debug:
+        for key, (p, d) in simplifier.data.items():
+            log.debug(f'( {p} ) * ( {d} )')
+
+    return simplifier()
+
+def merge_bucket(terms, symmetries, hermiticity=False):
+    # simplify of a single bucket, classes are returned with the position of
+    # their first term
+    simplifier = Simplifier(symmetries, hermiticity)
+    first = {}
+    for i, p, d in terms:
+        first.setdefault(simplifier.add(p, d), i)
+    return [(first[k], k, p, d) for k, (p, d) in simplifier.data.items()]
+
+
 class GenericSymmetry:
     def __init__(self, symmetries):
         self.symmetries = symmetries
@@ -470,14 +926,29 @@ class GenericSymmetry:
             tmp = s(tmp)
         return tmp
 
+class Gamma5Hermiticity:
+    def __call__(self, target):
+        from .dirac import hermitian_factor
+        c, factors = hermitian_factor(target)
+        return factors[0] if c == 1 and len(factors) == 1 else target
+
 class IdentitySymmetry:
     def __call__(self, target: Product):
         return target
+
+    def __eq__(self, other):
+        return isinstance(other, IdentitySymmetry)
     
 class ExchangeSymmetry:
     def __init__(self, **kwargs):
         self.kwargs = kwargs
 
+    def __eq__(self, other):
+        return isinstance(other, ExchangeSymmetry) and self.kwargs == other.kwargs
+
+    def __repr__(self):
+        return f'ExchangeSymmetry({self.kwargs})'
+
     def __call__(self, target):
         # if propagator is already symmetric no need to apply symmetry
         if hasattr(target, 'symmetric'):
@@ -0,0 +1,160 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+import hashlib
+import os
+import pickle
+import sys
+from time import monotonic
+
+from .algebra import Product, Sum, Simplifier, buckets, assemble
+from .wick import initial
+
+__all__ = [
+    "Budget",
+    "Checkpoint",
+]
+
+# long wick and simplify runs can be stopped and resumed: the state of the
+# search (or of the merge) is pickled to disk every few seconds and when a
+# budget is exhausted, in which case the partial result is returned. Running
+# the same job again with the same checkpoint continues from there
+
+def rss():
+    # peak resident memory of the process in MB, None if not available
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+class Budget:
+    # limits of a run in seconds, terms produced (or merged) and MB of memory;
+    # the first one that is reached stops the run and is recorded in stopped
+    def __init__(self, time=None, terms=None, memory=None):
+        self.time = time
+        self.terms = terms
+        self.memory = memory
+        self.stopped = None
+        self.start = monotonic()
+
+    def begin(self):
+        self.stopped = None
+        self.start = monotonic()
+
+    def __call__(self, terms):
+        if self.time is not None and monotonic() - self.start >= self.time:
+            self.stopped = 'time'
+        elif self.terms is not None and terms >= self.terms:
+            self.stopped = 'terms'
+        elif self.memory is not None and (rss() or 0) >= self.memory:
+            self.stopped = 'memory'
+        return self.stopped is not None
+
+class Checkpoint:
+    # state of a job in a pickle file, written at most every `every` seconds;
+    # the file is replaced atomically and removed when the job is complete
+    def __init__(self, path, every=60):
+        self.path = path
+        self.every = every
+        self.last = monotonic()
+
+    def load(self, key):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            saved, state = pickle.load(f)
+        if saved != key:
+            raise ValueError(f'{self.path} is the checkpoint of a different job')
+        return state
+
+    def save(self, key, state, force=False):
+        if not force and monotonic() - self.last < self.every:
+            return
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump((key, state), f)
+        os.replace(tmp, self.path)
+        self.last = monotonic()
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def job(kind, expr, *args):
+    # a checkpoint is only resumed by the job that wrote it
+    return hashlib.sha256(repr((kind, str(expr), args)).encode()).hexdigest()
+
+def wick(expr, orbits=False, fixed=(), checkpoint=None, budget=None):
+    # state: position of the current term, the search stack of its contractions
+    # and the terms built so far
+    checkpoint = Checkpoint(checkpoint) if isinstance(checkpoint, (str, os.PathLike)) else checkpoint
+    terms = expr.tolist(Sum)
+    key = job('wick', expr, orbits, tuple(map(str, fixed)))
+    state = None if checkpoint is None else checkpoint.load(key)
+    i, stack, out = (0, None, []) if state is None else state
+    if budget is not None:
+        budget.begin()
+    done = 0
+    while i < len(terms):
+        t = terms[i] if isinstance(terms[i], Product) else Product([terms[i]])
+        stack = initial(len(t.table())) if stack is None else stack
+        for term in t.wick_terms(orbits, fixed, stack):
+            out.append(term)
+            done += 1
+            if budget is not None and budget(done):
+                if checkpoint is not None:
+                    checkpoint.save(key, (i, stack, out), True)
+                return Sum(out)
+            if checkpoint is not None:
+                checkpoint.save(key, (i, stack, out))
+        i, stack = i + 1, None
+    if checkpoint is not None:
+        checkpoint.clear()
+    return Sum(out)
+
+def simplify(expr, symmetries=(), hermiticity=False, checkpoint=None, budget=None):
+    # buckets are merged one after the other, the state is the position in the
+    # buckets, the classes of the completed ones and the merge of the current one.
+    # A partial result has the classes merged so far and the remaining terms
+    checkpoint = Checkpoint(checkpoint) if isinstance(checkpoint, (str, os.PathLike)) else checkpoint
+    groups = buckets(expr, hermiticity)
+    key = job('simplify', expr, tuple(symmetries), hermiticity)
+    state = None if checkpoint is None else checkpoint.load(key)
+    b, n, classes, data, first = (0, 0, [], {}, {}) if state is None else state
+    if budget is not None:
+        budget.begin()
+    done = 0
+    while b < len(groups):
+        simplifier = Simplifier(symmetries, hermiticity)
+        simplifier.data = data
+        while n < len(groups[b]):
+            i, p, d = groups[b][n]
+            first.setdefault(simplifier.add(p, d), i)
+            n += 1
+            done += 1
+            if budget is not None and budget(done):
+                if checkpoint is not None:
+                    checkpoint.save(key, (b, n, classes, data, first), True)
+                rest = [p @ d for g in groups[b + 1:] for _, p, d in g] + [p @ d for _, p, d in groups[b][n:]]
+                merged = [p @ d for c in classes for _, _, p, d in c] + [p @ d for p, d in data.values()]
+                return Sum(merged + rest)
+            if checkpoint is not None:
+                checkpoint.save(key, (b, n, classes, data, first))
+        classes.append([(first[k], k, p, d) for k, (p, d) in data.items()])
+        b, n, data, first = b + 1, 0, {}, {}
+    if checkpoint is not None:
+        checkpoint.clear()
+    return assemble(classes, symmetries, hermiticity)
@@ -0,0 +1,253 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+# batch runner for headless jobs. A job file is json:
+#
+# {
+#   "fields": {"u": "quark", "d": "quark", "phi": {"type": "real", "tag": "\\phi"}},
+#   "operators": {
+#     "P": {"args": ["x", "s"], "expr": "dbar(x, a_s, c_s) * gamma('5', a_s, b_s) * u(x, b_s, c_s)"}
+#   },
+#   "expressions": {"C": "P('x', 'x') * Pdag('y', 'y')"},
+#   "replace": [{"pos": ["y", "x"]}],
+#   "contract": ["spin", "color"],
+#   "symmetries": [{"pos": ["z1", "z2"]}],
+#   "orbits": {"fixed": ["x", "y"]}
+# }
+#
+# quark and spinor fields u define u and ubar, complex scalars phi define phi
+# and phidag. Inside operators the arguments are replaced by their values, also
+# when they end a longer name (a_s above is a_x when s is 'x'). Every expression
+# goes through wick, replace, contract and simplify.
+
+import argparse
+import ast
+import hashlib
+import json
+import operator
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .algebra import Sum
+from . import (
+    RealScalarField, ComplexScalarField, SpinorField, QuarkField, PhotonField, DiracGamma,
+    CNumber, Symbol, ExchangeSymmetry, ColorDelta, AdjointDelta, ColorT, ColorF, ColorEpsilon,
+)
+
+__all__ = []
+
+fields = {
+    'real': lambda name, tag: {name: RealScalarField(tag)},
+    'photon': lambda name, tag: {name: PhotonField()},
+    'complex': lambda name, tag: dict(zip([name, f'{name}dag'], ComplexScalarField(tag))),
+    'spinor': lambda name, tag: dict(zip([name, f'{name}bar'], SpinorField(tag))),
+    'quark': lambda name, tag: dict(zip([name, f'{name}bar'], QuarkField(tag))),
+}
+
+functions = {
+    'gamma': DiracGamma,
+    'CNumber': CNumber,
+    'Symbol': Symbol,
+    'ColorDelta': ColorDelta,
+    'AdjointDelta': AdjointDelta,
+    'ColorT': ColorT,
+    'ColorF': ColorF,
+    'ColorEpsilon': ColorEpsilon,
+}
+
+binary = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Pow: operator.pow,
+}
+
+def evaluate(source, env):
+    # arithmetic of names, calls and constants only, nothing else is executed
+    def inner(node):
+        if isinstance(node, ast.Expression):
+            return inner(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, complex)):
+            return node.value
+        if isinstance(node, ast.Name):
+            if not node.id in env:
+                raise NameError(f'{node.id} is not defined in the job file')
+            return env[node.id]
+        if isinstance(node, ast.BinOp) and type(node.op) in binary:
+            left, right = inner(node.left), inner(node.right)
+            if isinstance(node.op, ast.Pow) and not isinstance(right, int):
+                raise ValueError('only integer powers are allowed')
+            return binary[type(node.op)](left, right)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            value = inner(node.operand)
+            return -value if isinstance(value, (int, float, complex)) else CNumber(-1) * value
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            return inner(node.func)(*map(inner, node.args))
+        raise ValueError(f'{ast.dump(node)} is not allowed in a job file')
+    return inner(ast.parse(source.strip(), mode='eval'))
+
+class Operator:
+    def __init__(self, name, args, expr, env):
+        self.name = name
+        self.args = list(args)
+        self.expr = expr
+        self.env = env
+
+    def __call__(self, *values):
+        if len(values) != len(self.args):
+            raise TypeError(f'{self.name} takes {len(self.args)} arguments')
+        env = dict(self.env)
+        env.update(zip(self.args, values))
+        # unknown names made of a prefix and an argument are labels
+        for node in ast.walk(ast.parse(self.expr.strip(), mode='eval')):
+            if isinstance(node, ast.Name) and not node.id in env and '_' in node.id:
+                prefix, arg = node.id.rsplit('_', 1)
+                if arg in self.args:
+                    env[node.id] = f'{prefix}_{values[self.args.index(arg)]}'
+        return evaluate(self.expr, env)
+
+def environment(job):
+    env = dict(functions)
+    for name, spec in job.get('fields', {}).items():
+        spec = {'type': spec} if isinstance(spec, str) else spec
+        if not spec['type'] in fields:
+            raise ValueError(f'unknown field type {spec["type"]}, expected one of {list(fields)}')
+        env.update(fields[spec['type']](name, spec.get('tag', name)))
+    for name, spec in job.get('operators', {}).items():
+        env[name] = Operator(name, spec.get('args', []), spec['expr'], env)
+    return env
+
+def run(job, name):
+    # the full pipeline for one expression, with the time and the number of
+    # terms after every stage
+    stats = {'name': name, 'stages': []}
+    def stage(label, func, *args):
+        t0 = time.perf_counter()
+        out = func(*args)
+        terms = len(out) if isinstance(out, Sum) else 1
+        stats['stages'].append({'stage': label, 'time': time.perf_counter() - t0, 'terms': terms})
+        return out
+
+    env = environment(job)
+    expr = stage('parse', evaluate, job['expressions'][name], env)
+    orbits = job.get('orbits')
+    if orbits:
+        out = stage('wick', lambda: expr.wick(orbits=True, fixed=orbits.get('fixed', ())))
+    else:
+        out = stage('wick', expr.wick)
+    for rdict in job.get('replace', []):
+        out = stage('replace', out.replace, rdict)
+    if job.get('contract'):
+        out = stage('contract', out.contract, *job['contract'])
+    symmetries = [ExchangeSymmetry(**kw) for kw in job.get('symmetries', [])]
+    out = stage('simplify', out.simplify, *symmetries)
+    return out, stats
+
+def key(job, name):
+    # results depend on the definitions and on the pipeline, not on the other
+    # expressions of the job
+    spec = {k: v for k, v in job.items() if k != 'expressions'}
+    spec['expression'] = job['expressions'][name]
+    spec['version'] = version()
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+def version():
+    try:
+        from importlib.metadata import version
+        return version('giancarlo')
+    except Exception:
+        return 'dev'
+
+def latex(name, result):
+    # rendered in latex whatever default.latex is
+    body = result.render(latex=True)
+    return f'\\begin{{equation}}\n{name} = {body}\n\\end{{equation}}\n'
+
+def write(output, name, result, formats):
+    paths = []
+    if 'pickle' in formats:
+        paths.append(os.path.join(output, f'{name}.pkl'))
+        with open(paths[-1], 'wb') as f:
+            pickle.dump(result, f)
+    if 'latex' in formats:
+        paths.append(os.path.join(output, f'{name}.tex'))
+        with open(paths[-1], 'w') as f:
+            f.write(latex(name, result))
+    return paths
+
+def parser():
+    p = argparse.ArgumentParser(prog='giancarlo', description='Runs the Wick contractions of a job file.')
+    p.add_argument('job', help='json job file')
+    p.add_argument('-o', '--output', default='.', help='directory of the results')
+    p.add_argument('-w', '--workers', type=int, default=None, help='expressions computed in parallel')
+    p.add_argument('-c', '--cache', default=None, help='directory of cached results, reused across runs')
+    p.add_argument('-s', '--stats', default=None, help='json file with timings and term counts of every stage')
+    p.add_argument('-f', '--format', action='append', choices=['pickle', 'latex'], help='output formats, default both')
+    p.add_argument('-e', '--expression', action='append', help='run only these expressions')
+    p.add_argument('-v', '--verbose', action='store_true')
+    return p
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    with open(args.job) as f:
+        job = json.load(f)
+    names = args.expression or list(job.get('expressions', {}))
+    for name in names:
+        if not name in job.get('expressions', {}):
+            raise SystemExit(f'giancarlo: expression {name} not found in {args.job}')
+    formats = args.format or ['pickle', 'latex']
+    os.makedirs(args.output, exist_ok=True)
+    if args.cache:
+        os.makedirs(args.cache, exist_ok=True)
+
+    def log(msg):
+        if args.verbose:
+            print(f'[giancarlo] {msg}', file=sys.stderr)
+
+    results = {}
+    todo = []
+    for name in names:
+        cached = os.path.join(args.cache, f'{key(job, name)}.pkl') if args.cache else None
+        if cached and os.path.exists(cached):
+            with open(cached, 'rb') as f:
+                results[name] = pickle.load(f)
+            results[name][1]['cached'] = True
+            log(f'{name} : cached')
+        else:
+            todo.append(name)
+
+    if args.workers is None or args.workers < 2 or len(todo) < 2:
+        done = [run(job, name) for name in todo]
+    else:
+        with ProcessPoolExecutor(args.workers) as pool:
+            done = list(pool.map(run, [job] * len(todo), todo))
+    for name, (result, stats) in zip(todo, done):
+        stats['cached'] = False
+        results[name] = (result, stats)
+        log(f'{name} : ' + ', '.join(f"{s['stage']} {s['time']:.3f}s {s['terms']} terms" for s in stats['stages']))
+        if args.cache:
+            with open(os.path.join(args.cache, f'{key(job, name)}.pkl'), 'wb') as f:
+                pickle.dump(results[name], f)
+
+    for name in names:
+        for path in write(args.output, name, results[name][0], formats):
+            log(f'{name} : written {path}')
+
+    if args.stats:
+        with open(args.stats, 'w') as f:
+            json.dump([results[name][1] for name in names], f, indent=1)
+    return 0
@@ -0,0 +1,231 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+from itertools import permutations
+
+from .algebra import Base, Interned, Product, Sum, CNumber, ContractedProduct
+from .qft import Propagator
+from .utils import Label
+
+__all__ = [
+    "ColorDelta",
+    "AdjointDelta",
+    "ColorT",
+    "ColorF",
+    "ColorEpsilon",
+    "reduce_color",
+]
+
+# SU(N) color algebra with generators normalized as Tr[T^A T^B] = delta^{AB} / 2;
+# fundamental labels are of type 'color', adjoint ones of type 'adjoint'
+N = 3
+
+# positions of the fundamental and adjoint labels of every kind of tensor
+slots = {
+    'delta': ((0, 1), ()),
+    'Delta': ((), (0, 1)),
+    'T': ((1, 2), (0,)),
+    'f': ((), (0, 1, 2)),
+    'epsilon': ((0, 1, 2), ()),
+}
+
+class ColorTensor(Base, metaclass=Interned):
+    color_tensor = True
+
+    def __init__(self, kind, labels, shown = True):
+        self.kind = kind
+        self.labels = tuple(map(Label.of, labels))
+        self.shown = shown
+        self.symmetric = kind in ('delta', 'Delta')
+        self.strings = {}
+
+    def key(kind, labels, shown = True):
+        return kind, tuple(map(Label.of, labels)), shown
+
+    def __reduce__(self):
+        return ColorTensor, (self.kind, self.labels, self.shown)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def slots(self, idx):
+        fundamental, adjoint = slots[self.kind]
+        return fundamental if idx == 'color' else adjoint if idx == 'adjoint' else ()
+
+    def __getitem__(self, idx):
+        # delta and T are matrices in color space and chain with propagators
+        if idx == 'color' and self.kind in ('delta', 'T'):
+            return self.labels[-2:]
+        if idx == 'adjoint' and self.kind == 'Delta':
+            return self.labels
+        return (None, None)
+
+    def __str__(self):
+        return self.render()
+
+    def format(self, hide, latex):
+        l = list(map(str, self.labels))
+        fundamental = f'_{{{l[-2]}{l[-1]}}}' if self.shown and not 'color' in hide else ''
+        if self.kind == 'delta':
+            return rf'\delta{fundamental}'
+        if self.kind == 'Delta':
+            return rf'\delta^{{{l[0]}{l[1]}}}'
+        if self.kind == 'T':
+            return rf'T^{{{l[0]}}}{fundamental}'
+        if self.kind == 'f':
+            return rf'f^{{{"".join(l)}}}'
+        return rf'\epsilon_{{{"".join(l)}}}'
+
+    def _replace(self, rdict):
+        labels = list(self.labels)
+        for idx in ('color', 'adjoint'):
+            if idx in rdict:
+                old, new = map(Label.of, rdict[idx])
+                for i in self.slots(idx):
+                    if labels[i] == old:
+                        labels[i] = new
+        return ColorTensor(self.kind, labels, self.shown)
+
+    def swap(self):
+        if self.symmetric:
+            return ColorTensor(self.kind, self.labels[::-1], self.shown)
+        return self
+
+    def stripe(self, index):
+        if index == 'color' and self.kind in ('delta', 'T'):
+            return ColorTensor(self.kind, self.labels, False)
+        return self
+
+def ColorDelta(a, b):
+    return ColorTensor('delta', (a, b))
+
+def AdjointDelta(A, B):
+    return ColorTensor('Delta', (A, B))
+
+def ColorT(A, a, b):
+    return ColorTensor('T', (A, a, b))
+
+def ColorF(A, B, C):
+    return ColorTensor('f', (A, B, C))
+
+def ColorEpsilon(a, b, c):
+    return ColorTensor('epsilon', (a, b, c))
+
+
+def parity(p):
+    return (-1) ** sum(1 for i in range(len(p)) for j in range(i) if p[j] > p[i])
+
+# eps_{a0 a1 a2} eps_{b0 b1 b2} = sum_p sign(p) delta_{a0 b_p0} delta_{a1 b_p1} delta_{a2 b_p2}
+epsilon_table = [(parity(p), p) for p in permutations(range(3))]
+
+def occurrences(factors, idx):
+    # how many times every label of type idx appears, also inside traces
+    count = {}
+    def inner(f):
+        if isinstance(f, ContractedProduct):
+            for g in f.factors:
+                inner(g)
+            return
+        if isinstance(f, ColorTensor):
+            labels = [f.labels[i] for i in f.slots(idx)]
+        elif isinstance(f, Propagator):
+            labels = [l for l in f[idx] if not l is None]
+        else:
+            return
+        for l in labels:
+            count[l] = count.get(l, 0) + 1
+    for f in factors:
+        inner(f)
+    return count
+
+def expand(coefficient, term, tensors, i, j, replacement):
+    # term with tensors i and j replaced by a sum of (coefficient, tensors)
+    rest = [f for k, f in enumerate(term.data) if not k in (tensors[i], tensors[j])]
+    return Sum([
+        reduce_color(coefficient * c * term.prefactor * Product(new + rest))
+        for c, new in replacement
+    ])
+
+def reduce_color(term):
+    # reduces color tensors of a term: deltas are eliminated against the other
+    # factors, T^A T^A through the Fierz identity, eps eps and f f through their
+    # contraction tables
+    if isinstance(term, Sum):
+        return Sum([reduce_color(t) for t in term.factors])
+    if not isinstance(term, Product):
+        term = Product([term])
+
+    data = term.data
+    tensors = [k for k, f in enumerate(data) if isinstance(f, ColorTensor)]
+    if not tensors:
+        return term
+
+    for k in tensors:
+        t = data[k]
+        if t.kind in ('T', 'f', 'epsilon') and len(set(t.labels)) < len(t.labels):
+            # traceless generators, antisymmetric tensors
+            if t.kind != 'T' or t.labels[1] == t.labels[2]:
+                return Sum([])
+
+    for k in tensors:
+        t = data[k]
+        if not t.kind in ('delta', 'Delta'):
+            continue
+        idx = 'color' if t.kind == 'delta' else 'adjoint'
+        a, b = t.labels
+        rest = data[:k] + data[k+1:]
+        if a == b:
+            dim = N if t.kind == 'delta' else N * N - 1
+            return reduce_color(CNumber(dim) * term.prefactor * Product(rest))
+        count = occurrences(rest, idx)
+        for old, new in ((b, a), (a, b)):
+            if count.get(old, 0) == 1:
+                rest = [f._replace({idx: [old, new]}) for f in rest]
+                return reduce_color(term.prefactor * Product(rest))
+
+    for i in range(len(tensors)):
+        for j in range(i + 1, len(tensors)):
+            s, t = data[tensors[i]], data[tensors[j]]
+            if s.kind != t.kind:
+                continue
+            if s.kind == 'T' and s.labels[0] == t.labels[0]:
+                # T^A_{ab} T^A_{cd} = 1/2 (delta_{ad} delta_{bc} - 1/N delta_{ab} delta_{cd})
+                _, a, b = s.labels
+                _, c, d = t.labels
+                return expand(CNumber(1, 2), term, tensors, i, j, [
+                    (CNumber(1), [ColorDelta(a, d), ColorDelta(b, c)]),
+                    (CNumber(-1, N), [ColorDelta(a, b), ColorDelta(c, d)]),
+                ])
+            if s.kind == 'epsilon' and set(s.labels) & set(t.labels):
+                return expand(CNumber(1), term, tensors, i, j, [
+                    (CNumber(sign), [ColorDelta(s.labels[k], t.labels[p[k]]) for k in range(3)])
+                    for sign, p in epsilon_table
+                ])
+            if s.kind == 'f':
+                shared = [l for l in s.labels if l in t.labels]
+                if len(shared) >= 2:
+                    # bring the shared labels to the end of both tensors
+                    ps = [s.labels.index(l) for l in s.labels if not l in shared] + [s.labels.index(l) for l in shared]
+                    pt = [t.labels.index(l) for l in t.labels if not l in shared] + [t.labels.index(l) for l in shared]
+                    sign = parity(ps) * parity(pt)
+                    if len(shared) == 3:
+                        return expand(CNumber(sign * N * (N * N - 1)), term, tensors, i, j, [(CNumber(1), [])])
+                    # f^{ACD} f^{BCD} = N delta^{AB}
+                    return expand(CNumber(sign * N), term, tensors, i, j, [
+                        (CNumber(1), [AdjointDelta(s.labels[ps[0]], t.labels[pt[0]])])
+                    ])
+    return term
@@ -0,0 +1,230 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import numpy as np
+
+from .algebra import Product, Sum, CNumber
+from .table import FieldTable
+from .topology import Topology, UniqueTopology
+from .wick import Contraction, wick_stream, contraction_sign
+from .draw import render
+from .utils import print
+
+__all__ = [
+    "CorrelatorMatrix",
+    "block_wick",
+]
+
+# a complete contraction of sink * source is a partial contraction internal to
+# the sink, one internal to the source and the contraction of the fields left
+# open across the two. The partial contractions of every operator are built once
+# and shared by all the entries of its row or column
+
+def partial_stream(table):
+    # all the contractions of a subset of the fields, as pairs and open fields
+    compatible = table.compatible()
+    n = len(table)
+    stack = [(0, (1 << n) - 1, (), ())]
+    while stack:
+        i, remaining, pairs, opened = stack.pop()
+        while i < n and not (remaining >> i) & 1:
+            i += 1
+        if i == n:
+            yield list(pairs), list(opened)
+            continue
+        rest = remaining & ~(1 << i)
+        for j in reversed(range(i + 1, n)):
+            if not (rest >> j) & 1:
+                continue
+            if compatible[i, j]:
+                stack.append((i + 1, rest & ~(1 << j), pairs + ((i, j),), opened))
+            elif compatible[j, i]:
+                stack.append((i + 1, rest & ~(1 << j), pairs + ((j, i),), opened))
+        stack.append((i + 1, rest, pairs, opened + (i,)))
+
+def charge(fields, conjugate=False):
+    # open fields of a sink can only be contracted with open fields of a source
+    # of conjugate charge
+    count = {}
+    for f in fields:
+        anti = getattr(f, 'anti', None)
+        key = (f.id, anti if anti is None else anti != conjugate)
+        count[key] = count.get(key, 0) + 1
+    return tuple(sorted(count.items(), key=repr))
+
+class Operator:
+    def __init__(self, expr):
+        expr = expr if isinstance(expr, Product) else Product([expr])
+        self.prefactor = expr.prefactor
+        self.table = expr.table()
+        self.others = [f for f in expr.data if not hasattr(f, 'can_be_contracted')]
+        self.partials = {}
+        fields = self.table.fields
+        for pairs, opened in partial_stream(self.table):
+            key = charge([fields[i] for i in opened])
+            self.partials.setdefault(key, []).append((pairs, opened, Contraction(fields, pairs)()))
+
+    def __len__(self):
+        return len(self.table)
+
+def entry(sinks, sources, indices=(), symmetries=()):
+    # simplified Sum of all the contractions of sink * source, operators that are
+    # sums are given as the lists of their terms
+    terms = []
+    for sink in sinks:
+        for source in sources:
+            terms.extend(contractions(sink, source))
+    out = Sum(terms)
+    if indices:
+        out = out.contract(*indices)
+    return out.simplify(*symmetries)
+
+def connectable(charges):
+    # block level test on the charges of the open fields: every field meets its
+    # conjugate, and the partners of the open fields of a block are found in
+    # the other blocks
+    count = {}
+    total = {}
+    for c in charges:
+        for (id, anti), n in c:
+            key = (id, anti is None)
+            count[key] = count.get(key, 0) + (-n if anti else n)
+            total[id, anti] = total.get((id, anti), 0) + n
+    if not all(n % 2 == 0 if real else n == 0 for (_, real), n in count.items()):
+        return False
+    for c in charges:
+        own = dict(c)
+        for (id, anti), n in c:
+            conj = (id, None if anti is None else not anti)
+            if n > total.get(conj, 0) - own.get(conj, 0):
+                return False
+    return True
+
+def pairings(*blocks, cache=None):
+    # complete contractions of the product of the blocks as pairs of positions
+    # in the concatenated fields, with their sign and propagators. Every block
+    # chooses one of its partial contractions, the open fields left are only
+    # contracted across different blocks. The contractions between blocks only
+    # depend on the kind of the open fields and on their blocks, and are kept
+    # in cache
+    cache = {} if cache is None else cache
+    offsets = np.cumsum([0] + [len(b) for b in blocks]).tolist()
+    fields = [f for b in blocks for f in b.table.fields]
+    fermions = sum(1 << i for i, f in enumerate(fields) if not f.boson)
+    # partial contractions leaving open fields without partners in the other
+    # blocks are dropped before combining the blocks
+    charges = [dict(charge(b.table.fields, True)) for b in blocks]
+    viable = [
+        [(c, p) for c, p in b.partials.items() if all(n <= sum(o.get(key, 0) for o in charges[:k] + charges[k + 1:]) for key, n in c)]
+        for k, b in enumerate(blocks)
+    ]
+    for groups in product(*viable):
+        if not connectable([c for c, _ in groups]):
+            continue
+        for partials in product(*[p for _, p in groups]):
+            positions, owner, inner, props = [], [], [], []
+            for k, (pa, oa, pr) in enumerate(partials):
+                positions += [offsets[k] + i for i in oa]
+                owner += [k] * len(oa)
+                inner += [(offsets[k] + i, offsets[k] + j) for i, j in pa]
+                props += pr
+            opened = [fields[i] for i in positions]
+            key = tuple((k, f.id, getattr(f, 'anti', None)) for k, f in zip(owner, opened))
+            if not key in cache:
+                owner = np.array(owner, dtype=int)
+                mask = owner[:, None] != owner[None, :]
+                cache[key] = [cross for cross, _ in wick_stream(FieldTable(opened), mask)]
+            for cross in cache[key]:
+                pairs = inner + [(positions[i], positions[j]) for i, j in cross]
+                yield pairs, contraction_sign(pairs, fermions), props + Contraction(opened, cross)()
+
+def contractions(*blocks, cache=None):
+    others = [f for b in blocks for f in b.others]
+    prefactor = CNumber(1)
+    for b in blocks:
+        prefactor = prefactor * b.prefactor
+    reduce = None
+    if any(getattr(f, 'color_tensor', False) for f in others):
+        from .color import reduce_color as reduce
+    for _, sign, props in pairings(*blocks, cache=cache):
+        term = CNumber(sign) * prefactor * Product(others + props)
+        yield term if reduce is None else reduce(term)
+
+def block_wick(*operators):
+    # Wick contractions of the product of the operators, each kept as a block:
+    # the partial contractions of every operator are built once and only the
+    # open fields are contracted between blocks. Operators that are sums are
+    # expanded term by term
+    blocks = [[Operator(t) for t in o.tolist(Sum)] for o in operators]
+    cache = {}
+    return Sum([t for choice in product(*blocks) for t in contractions(*choice, cache=cache)])
+
+class CorrelatorMatrix:
+    # entry [i][j] is the simplified Wick contraction of sinks[i] * sources[j];
+    # diagrams is the table of unique topologies of all the entries and
+    # which[i][j] lists the diagrams appearing in entry [i][j]
+    def __init__(self, sinks, sources, indices=(), symmetries=(), workers=None):
+        rows = [[Operator(t) for t in o.tolist(Sum)] for o in sinks]
+        cols = [[Operator(t) for t in o.tolist(Sum)] for o in sources]
+        jobs = [(a, b) for a in rows for b in cols]
+        n = len(jobs)
+        args = ([a for a, _ in jobs], [b for _, b in jobs], [tuple(indices)] * n, [tuple(symmetries)] * n)
+        if workers is None or workers < 2 or n < 2:
+            results = list(map(entry, *args))
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(entry, *args))
+        self.entries = [results[i * len(cols):(i + 1) * len(cols)] for i in range(len(rows))]
+
+        self.diagrams = []
+        self.which = []
+        groups = {}
+        for row in self.entries:
+            self.which.append([])
+            for s in row:
+                ids = []
+                for t in s.factors:
+                    topo = Topology(t)
+                    if not topo.signature in groups:
+                        groups[topo.signature] = len(self.diagrams)
+                        self.diagrams.append(UniqueTopology(topo))
+                    k = groups[topo.signature]
+                    self.diagrams[k].terms.append(t)
+                    if not k in ids:
+                        ids.append(k)
+                self.which[-1].append(ids)
+
+    @property
+    def shape(self):
+        return len(self.entries), len(self.entries[0]) if self.entries else 0
+
+    def __getitem__(self, idx):
+        i, j = idx
+        return self.entries[i][j]
+
+    def __str__(self):
+        return '\n'.join(f'[{i},{j}] {s}' for i, row in enumerate(self.entries) for j, s in enumerate(row))
+
+    def report(self):
+        for k, d in enumerate(self.diagrams):
+            print(f'[{k}] {len(d)} terms')
+        for i, row in enumerate(self.which):
+            for j, ids in enumerate(row):
+                print(f'[{i},{j}] diagrams {ids}')
+
+    def draw(self, filename, **kwargs):
+        # the shared table, every unique diagram once
+        return render([d.diagram(f'[{k}]') for k, d in enumerate(self.diagrams)], filename, **kwargs)
@@ -0,0 +1,269 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+from functools import lru_cache
+
+from .algebra import Base, Interned, Product, Sum, CNumber, ContractedProduct
+from .qft import Propagator
+from .utils import Label
+
+__all__ = [
+    "Delta",
+    "Epsilon",
+    "trace_table",
+    "reduce_gammas",
+    "gamma5_hermiticity",
+]
+
+# Euclidean gamma matrices, {g_mu, g_nu} = 2 delta_{mu nu} and
+# g_5 = g_1 g_2 g_3 g_4, so that Tr[g_5 g_mu g_nu g_rho g_sigma] = 4 eps_{mu nu rho sigma}
+dimension = 4
+
+class Delta(Propagator):
+    # metric tensor, labels are kept in canonical order
+    def __init__(self, tag, index, symmetric = False, linestyle = 'default', gamma = False, dagger = False):
+        index = {key: tuple(sorted(val, key=str)) for key, val in index.items()}
+        super().__init__(tag, index, symmetric, linestyle, gamma, dagger)
+
+    def format(self, hide, latex):
+        a, b = self['lorentz']
+        return f'{self.tag}_{{{a}{b}}}'
+
+def delta(mu, nu):
+    return Delta(r'\delta', {'lorentz': (mu, nu)})
+
+class Epsilon(Base, metaclass=Interned):
+    def __init__(self, labels):
+        self.labels = tuple(map(Label.of, labels))
+        self.strings = {}
+
+    def key(labels):
+        return tuple(map(Label.of, labels))
+
+    def __reduce__(self):
+        return Epsilon, (self.labels,)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __str__(self):
+        return self.render()
+
+    def format(self, hide, latex):
+        return rf'\epsilon_{{{"".join(map(str, self.labels))}}}'
+
+    def __getitem__(self, idx):
+        return (None, None)
+
+    def _replace(self, rdict):
+        if not 'lorentz' in rdict:
+            return self
+        old, new = map(Label.of, rdict['lorentz'])
+        return Epsilon([new if l == old else l for l in self.labels])
+
+def epsilon(labels):
+    # sign and tensor with labels in canonical order, None if a label repeats
+    if len(set(labels)) < len(labels):
+        return 0, None
+    order = sorted(range(len(labels)), key=lambda i: str(labels[i]))
+    inversions = sum(1 for i in range(len(order)) for j in range(i) if order[j] > order[i])
+    return (-1) ** inversions, Epsilon([labels[i] for i in order])
+
+
+def is_gamma(f):
+    return isinstance(f, Propagator) and f.gamma
+
+def is_gamma5(f):
+    return str(f['lorentz'][0]) == '5'
+
+@lru_cache(maxsize=None)
+def trace_table(n):
+    # Tr[g_0 ... g_{n-1}] / 4 as signed pairings (i, j), each standing for delta_{ij};
+    # g_0 is anticommuted next to g_k
+    if n == 0:
+        return ((1, ()),)
+    if n % 2:
+        return ()
+    out = []
+    for k in range(1, n):
+        rest = [i for i in range(1, n) if i != k]
+        for sign, pairs in trace_table(n - 2):
+            out.append(((-1) ** (k - 1) * sign, ((0, k),) + tuple((rest[a], rest[b]) for a, b in pairs)))
+    return tuple(out)
+
+def contract_deltas(pairs):
+    # repeated labels are summed over: delta_{mu mu} = d, delta_{mu nu} delta_{nu rho} = delta_{mu rho}
+    factor = 1
+    pairs = list(pairs)
+    i = 0
+    while i < len(pairs):
+        a, b = pairs[i]
+        if a == b:
+            factor *= dimension
+            pairs.pop(i)
+            i = 0
+            continue
+        for j in range(i + 1, len(pairs)):
+            c, d = pairs[j]
+            shared = {a, b} & {c, d}
+            if shared:
+                x = shared.pop()
+                pairs[i] = (b if a == x else a, d if c == x else c)
+                pairs.pop(j)
+                break
+        else:
+            i += 1
+            continue
+        i = 0
+    return factor, pairs
+
+def trace(gammas):
+    # Tr over spin of a product of gamma matrices, None if not tabulated
+    sign, n5, rest = 1, 0, []
+    for g in gammas:
+        if is_gamma5(g):
+            # g_5 anticommutes to the front
+            sign *= (-1) ** len(rest)
+            n5 += 1
+        else:
+            rest.append(g['lorentz'][0])
+
+    if n5 % 2 == 0:
+        terms = []
+        for s, pairs in trace_table(len(rest)):
+            factor, pairs = contract_deltas([(rest[i], rest[j]) for i, j in pairs])
+            terms.append(CNumber(dimension * sign * s * factor) * Product([delta(a, b) for a, b in pairs]))
+        return Sum(terms)
+    if len(rest) != 4:
+        return Sum([]) if len(rest) < 4 or len(rest) % 2 else None
+    s, eps = epsilon(rest)
+    return Sum([CNumber(dimension * sign * s) * eps]) if s else Sum([])
+
+def reduce_chain(cp):
+    # adjacent g_5 g_5 = 1 and g_mu g_mu = d inside traces and open chains; the
+    # spin label of the following (or preceding) factor is moved over the pair
+    factors = list(cp.factors)
+    closed = cp.open_indices[0] == cp.open_indices[1] and not cp.open_indices[0] is None
+    coefficient = 1
+    i = 0
+    while len(factors) > 2 and i < len(factors) - (0 if closed else 1):
+        j = (i + 1) % len(factors)
+        f, g = factors[i], factors[j]
+        if is_gamma(f) and is_gamma(g) and f['lorentz'][0] == g['lorentz'][0]:
+            a, c = f[cp.index][0], g[cp.index][1]
+            coefficient *= 1 if is_gamma5(f) else dimension
+            if closed or j + 1 < len(factors):
+                k = (j + 1) % len(factors)
+                factors[k] = factors[k]._replace({cp.index: [c, a]})
+            else:
+                factors[i - 1] = factors[i - 1]._replace({cp.index: [a, c]})
+            factors = [h for n, h in enumerate(factors) if not n in (i, j)]
+            i = 0
+            continue
+        i += 1
+    if len(factors) == len(cp.factors):
+        return 1, cp
+    return coefficient, ContractedProduct(factors, cp.index)
+
+def reduce_factor(f):
+    if not isinstance(f, ContractedProduct):
+        return f
+    if f.index != 'spin':
+        # nested traces, coefficients are pulled out
+        coefficient, factors = 1, []
+        for g in f.factors:
+            if isinstance(g, ContractedProduct) and g.index == 'spin':
+                c, g = reduce_chain(g)
+                coefficient *= c
+            factors.append(g)
+        out = ContractedProduct(factors, f.index)
+        return out if coefficient == 1 else CNumber(coefficient) * out
+    a, b = f.open_indices
+    if a == b and not a is None and all(is_gamma(g) for g in f.factors):
+        out = trace(f.factors)
+        if not out is None:
+            return out
+    coefficient, out = reduce_chain(f)
+    return out if coefficient == 1 else CNumber(coefficient) * out
+
+def reduce_gammas(expr):
+    # evaluates traces of gamma matrices after contract('spin'), and simplifies
+    # adjacent gammas inside traces with propagators
+    if isinstance(expr, Sum):
+        return Sum([reduce_gammas(f) for f in expr.factors])
+    if not isinstance(expr, Product):
+        expr = Product([expr])
+    return Product.from_factors([expr.prefactor] + [reduce_factor(f) for f in expr.data])
+
+
+# gamma_5-hermiticity of quark propagators, S(y, x) = g_5 S(x, y)^dagger g_5 as
+# matrices in spin and color: every quark propagator is written with its
+# positions in canonical order, so that only one orientation is left
+
+def gamma5(a, b):
+    return Propagator(r'\gamma', {'lorentz': ('5', '5'), 'spin': (a, b)}, gamma=True)
+
+def is_quark(f):
+    return isinstance(f, Propagator) and not (f.gamma or f.symmetric) and 'spin' in f.index and 'pos' in f.index
+
+def dummy(f, slot):
+    # spin label between an inserted g_5 and the slot of the propagator f; a
+    # label is shared by the end of a propagator and the start of the next one,
+    # so the positions and the slot enter too. The same at every call
+    x, y = f['pos']
+    return Label(rf'{f["spin"][slot]}^{{({x}{y},{slot})}}')
+
+def reorient(f):
+    x, y = f['pos']
+    if str(x) <= str(y):
+        return [f]
+    a, b = f['spin']
+    c, d = dummy(f, 0), dummy(f, 1)
+    index = {key: (y, x) if key == 'pos' else (c, d) if key == 'spin' else val for key, val in f.index.items()}
+    return [gamma5(a, c), Propagator(f.tag, index, f.symmetric, f.linestyle, f.gamma, not f.dagger), gamma5(d, b)]
+
+def hermitian_factor(f):
+    # coefficient and factors replacing f, pairs of g_5 are cancelled in spin chains
+    if is_quark(f):
+        return 1, reorient(f)
+    if not isinstance(f, ContractedProduct):
+        return 1, [f]
+    coefficient, factors = 1, []
+    for g in f.factors:
+        c, gs = hermitian_factor(g)
+        coefficient *= c
+        factors.extend(gs)
+    if len(factors) == len(f.factors) and all(g is h for g, h in zip(factors, f.factors)):
+        return coefficient, [f]
+    out = ContractedProduct(factors, f.index)
+    if f.index == 'spin':
+        c, out = reduce_chain(out)
+        coefficient *= c
+    return coefficient, [out]
+
+def gamma5_hermiticity(expr):
+    if isinstance(expr, Sum):
+        return Sum([gamma5_hermiticity(f) for f in expr.factors])
+    if not isinstance(expr, Product):
+        expr = Product([expr])
+    coefficient, factors = 1, []
+    for f in expr.data:
+        c, fs = hermitian_factor(f)
+        coefficient *= c
+        factors.extend(fs)
+    prefactor = expr.prefactor if coefficient == 1 else CNumber(coefficient) * expr.prefactor
+    return Product.from_factors([prefactor] + factors)
@@ -0,0 +1,169 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+import os
+import pickle
+import sqlite3
+import tempfile
+import zlib
+
+from .algebra import Sum, Product, write, invariants
+
+__all__ = [
+    "DiskSum",
+]
+
+class DiskSum:
+    # out-of-core Sum: terms are pickled into a sqlite file, sharded by the
+    # invariants that also split simplify into buckets (without daggers and g_5,
+    # as with hermiticity). Terms that simplify can merge share them, so every
+    # shard can be simplified alone and at most one shard is held in memory.
+    # Sums derived without a path (map, wick, simplify) are temporary files that
+    # close, or the end of a with block, removes together with this one
+    def __init__(self, path=None, shards=64, batch=1000):
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix='.sqlite', prefix='giancarlo-')
+            os.close(fd)
+            self.temporary = True
+        else:
+            self.temporary = False
+        self.path = path
+        self.shards = shards
+        self.batch = batch
+        self.buffer = []
+        self.derived = []
+
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS terms (shard INTEGER, term BLOB)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS terms_shard ON terms (shard)')
+
+    def shard(self, term):
+        key = invariants(term.data, True) if isinstance(term, Product) else ()
+        return zlib.crc32(repr(key).encode()) % self.shards
+
+    def add(self, term):
+        # terms are buffered and written every batch terms, the rest only by
+        # flush, which every read (partitions, len) calls first
+        for t in (term.factors if isinstance(term, Sum) else [term]):
+            t = t if isinstance(t, Product) else Product([t])
+            self.buffer.append((self.shard(t), pickle.dumps(t, pickle.HIGHEST_PROTOCOL)))
+        if len(self.buffer) >= self.batch:
+            self.flush()
+        return self
+
+    def extend(self, terms):
+        for t in terms:
+            self.add(t)
+        return self
+
+    def flush(self):
+        if self.buffer:
+            self.db.executemany('INSERT INTO terms VALUES (?, ?)', self.buffer)
+            self.db.commit()
+            self.buffer = []
+
+    def partitions(self):
+        self.flush()
+        return [s for s, in self.db.execute('SELECT DISTINCT shard FROM terms ORDER BY shard')]
+
+    def partition(self, shard):
+        self.flush()
+        for blob, in self.db.execute('SELECT term FROM terms WHERE shard = ? ORDER BY rowid', (shard,)):
+            yield pickle.loads(blob)
+
+    def __iter__(self):
+        for shard in self.partitions():
+            yield from self.partition(shard)
+
+    def __len__(self):
+        self.flush()
+        return self.db.execute('SELECT COUNT(*) FROM terms').fetchone()[0]
+
+    def new(self, path=None):
+        out = DiskSum(path, self.shards, self.batch)
+        if out.temporary:
+            self.derived.append(out)
+        return out
+
+    def map(self, func, path=None):
+        # func is applied term by term, its output is re-sharded
+        out = self.new(path)
+        for t in self:
+            out.add(func(t))
+        out.flush()
+        return out
+
+    def contract(self, *indices, path=None):
+        return self.map(lambda t: t.contract(*indices), path)
+
+    def replace(self, rdict, path=None):
+        return self.map(lambda t: t.replace(rdict), path)
+
+    def wick(self, path=None):
+        out = self.new(path)
+        for t in self:
+            out.wick_from(t)
+        out.flush()
+        return out
+
+    def wick_from(self, expr):
+        # contractions are streamed into the partitions, identical terms are
+        # only merged by simplify
+        for f in (expr.factors if isinstance(expr, Sum) else [expr]):
+            f = f if isinstance(f, Product) else Product([f])
+            for term in f.wick_terms():
+                self.add(term)
+        return self
+
+    def simplify(self, *args, workers=None, hermiticity=False, path=None):
+        # the shards follow the buckets with hermiticity, so it can be forwarded
+        out = self.new(path)
+        for shard in self.partitions():
+            out.add(Sum(list(self.partition(shard))).simplify(*args, workers=workers, hermiticity=hermiticity))
+        out.flush()
+        return out
+
+    def sum(self):
+        return Sum(list(self))
+
+    def write(self, file=None, latex=None, hide=()):
+        # shard by shard, the terms are never all in memory
+        return write(self, file, latex, hide)
+
+    def close(self):
+        for d in self.derived:
+            d.close()
+        self.derived = []
+        self.remove()
+
+    def remove(self):
+        self.db.close()
+        if self.temporary and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        # only the own file, the derived sums may still be referenced
+        try:
+            self.remove()
+        except Exception:
+            pass
+
+    def __str__(self):
+        return str(self.sum())
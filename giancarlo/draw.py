@@ -12,56 +12,45 @@
 # GNU General Public License for more details.
 #
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import FancyArrowPatch, Circle
-from matplotlib.path import Path
-import math
-
-plt.rcParams.update({
-    'text.usetex': True,
-    'font.size': 14
-})
-
+# matplotlib is imported only when something is drawn, so that headless jobs
+# never load it
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import math
+import os
 
 __all__ = [
     "Diagram",
-    "PlotStyle"
+    "PlotStyle",
+    "render",
 ]
 
 
-
-
 def squiggle_patch(p0, p1, n_periods=5, amp=0.05, n_points=300, **patch_kwargs):
-    x0, y0 = p0
-    x1, y1 = p1
-
-    dx, dy = x1 - x0, y1 - y0
-    length = math.hypot(dx, dy)
-
-    nx, ny = -dy / length, dx / length
+    from matplotlib.patches import PathPatch
+    from matplotlib.path import Path
 
-    verts = []
-    codes = []
-    for i in range(n_points):
-        t = i / (n_points-1)
-        x = x0 + dx * t
-        y = y0 + dy * t
+    p0 = np.asarray(p0, dtype=float)
+    d = np.asarray(p1, dtype=float) - p0
+    n = np.array([-d[1], d[0]]) / math.hypot(*d)
 
-        # Sinusoidal offset
-        phase = 2 * math.pi * n_periods * t
-        offset = amp * math.sin(phase)
+    # sinusoidal offset along the normal of the segment
+    t = np.linspace(0.0, 1.0, n_points)
+    offset = amp * np.sin(2 * math.pi * n_periods * t)
+    verts = p0 + t[:, None] * d + offset[:, None] * n
 
-        x += nx * offset
-        y += ny * offset
-
-        verts.append((x,y))
-        codes.append(Path.MOVETO if i==0 else Path.LINETO)
+    codes = np.full(n_points, Path.LINETO, dtype=Path.code_type)
+    codes[0] = Path.MOVETO
 
     path = Path(verts, codes)
-    return patches.PathPatch(path, fill=False, **patch_kwargs)
+    return PathPatch(path, fill=False, **patch_kwargs)
+
 
+def mathtext(label):
+    # mathtext has no \big delimiters
+    for big in [r'\big[', r'\big]', r'\big(', r'\big)']:
+        label = label.replace(big, big[-1])
+    return label
 
 
 class PlotStyle:
@@ -71,6 +60,17 @@ class PlotStyle:
         'squiggle': '',
     }
     style = 'default'
+    usetex = True
+    fontsize = 14
+
+    @staticmethod
+    def context(usetex=None):
+        import matplotlib.style
+        usetex = PlotStyle.usetex if usetex is None else usetex
+        return matplotlib.style.context([PlotStyle.style, {
+            'text.usetex': usetex,
+            'font.size': PlotStyle.fontsize,
+        }])
 
     @staticmethod
     def point(color='C0', size=80):
@@ -111,11 +111,16 @@ class Points:
         return
     
 class Diagram:
-    def __init__(self, nconn):
-        plt.style.use(PlotStyle.style)
-
-        self.fig, self.ax = plt.subplots(figsize=(5,3.5))
+    def __init__(self, nconn, ax=None, usetex=None):
+        if ax is None:
+            import matplotlib.pyplot as plt
+            with PlotStyle.context(usetex):
+                self.fig, self.ax = plt.subplots(figsize=(5,3.5))
+        else:
+            self.fig, self.ax = ax.figure, ax
         self.ax.axis('off')
+        self.usetex = PlotStyle.usetex if usetex is None else usetex
+        self.text = {'usetex': self.usetex, 'fontsize': PlotStyle.fontsize}
 
         self.nconn = nconn
         self.pts = Points()
@@ -123,22 +128,27 @@ class Diagram:
             self.pts.init(i)
         self.pts.fill_points_circle()
 
+    def label(self, text):
+        return text if self.usetex else mathtext(text)
+
     def draw_point(self, pt, x):
         style = PlotStyle.points[x] if x in PlotStyle.points else PlotStyle.points['default']
 
         self.ax.scatter(*pt, **style)
-        self.ax.text(*pt, f'  ${x}$')
+        self.ax.text(*pt, self.label(f'  ${x}$'), **self.text)
 
 
     def __call__(self, title=''):        
-        self.ax.set_title(title)
-        self.fig.tight_layout()
+        self.ax.set_title(self.label(title), **self.text)
+        if self.ax is self.fig.axes[0] and len(self.fig.axes) == 1:
+            self.fig.tight_layout()
 
     def line(self, x, y, s, nl):
         ls = PlotStyle.linestyles[s] if s in PlotStyle.linestyles else PlotStyle.linestyles['default']
         if s=='squiggle':
             patch = squiggle_patch(x, y)
-        elif s=='default':
+        else:
+            from matplotlib.patches import FancyArrowPatch
             patch = FancyArrowPatch(
                 x, y,
                 connectionstyle=f"arc3,rad={0.3 + 0.1 * nl}",
@@ -148,24 +158,23 @@ class Diagram:
         self.ax.add_patch(patch)
 
     def tadpole(self, x, s, nl):
+        from matplotlib.patches import Circle
         x1, x2 = x
         r = 0.3 + 0.1 * nl
         patch = Circle((x1+r, x2), radius=r, fill=False)
         self.ax.add_patch(patch)
 
     def draw_connected_diagram(self, idx, propagators):
+        # propagators are given as (x, y, linestyle)
         pts = Points()
 
-        for p in propagators:
-            x, y = p.fx['pos'], p.fy['pos']
+        for x, y, _ in propagators:
             pts.init(x)
             pts.init(y)
 
         pts.fill_points_circle(radius=0.5, center=self.pts[idx])
         
-        for p in propagators:
-            x, y = p.fx['pos'], p.fy['pos']
-            s = p.linestyle
+        for x, y, s in propagators:
             if x==y:
                 self.tadpole(pts[x], s, pts.nlines[x])
             else:
@@ -176,4 +185,51 @@ class Diagram:
             self.draw_point(pts[x], x)
 
         del pts
-            
+
+    def draw(self, connected, title=''):
+        for i, conn in enumerate(connected):
+            self.draw_connected_diagram(i, conn)
+        self(title)
+
+
+def render_page(diagrams, ncols, usetex, path=None):
+    # one figure per page, built without pyplot so that no window is opened
+    from matplotlib.figure import Figure
+
+    nrows = max(1, -(-len(diagrams) // ncols))
+    with PlotStyle.context(usetex):
+        fig = Figure(figsize=(4 * ncols, 3 * nrows))
+        for k, (connected, title) in enumerate(diagrams):
+            ax = fig.add_subplot(nrows, ncols, k + 1)
+            Diagram(len(connected), ax=ax, usetex=usetex).draw(connected, title)
+            ax.title.set_fontsize('x-small')
+        fig.tight_layout()
+        if path is not None:
+            fig.savefig(path)
+    return fig if path is None else path
+
+
+def render(diagrams, filename, per_page=12, ncols=4, usetex=None, workers=None):
+    # diagrams are (connected, title) pairs, with connected the list of connected
+    # pieces, each a list of (x, y, linestyle); pdf files hold all pages, other
+    # formats are written as one file per page. Workers draw the pages of the
+    # other formats; a pdf file is written by one process, so that its pages
+    # stay vector graphics
+    usetex = PlotStyle.usetex if usetex is None else usetex
+    pages = [diagrams[i:i + per_page] for i in range(0, len(diagrams), per_page)]
+    ncols = min(ncols, per_page)
+
+    stem, ext = os.path.splitext(filename)
+    if ext.lower() == '.pdf':
+        from matplotlib.backends.backend_pdf import PdfPages
+        with PdfPages(filename) as pdf:
+            for page in pages:
+                pdf.savefig(render_page(page, ncols, usetex))
+        return [filename]
+
+    paths = [f'{stem}-{i:03d}{ext}' for i in range(len(pages))] if len(pages) > 1 else [filename]
+    if workers is None or workers < 2 or len(pages) < 2:
+        return [render_page(page, ncols, usetex, path) for page, path in zip(pages, paths)]
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(render_page, page, ncols, usetex, path) for page, path in zip(pages, paths)]
+        return [f.result() for f in futures]
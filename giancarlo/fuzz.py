@@ -0,0 +1,109 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+import random
+import time
+
+from .qft import RealField, ComplexField
+from .utils import Namespace
+from . import wick
+
+__all__ = [
+    "random_fields",
+    "fuzz",
+]
+
+# differential testing of the Wick engines against the permutation-based
+# reference wick_fields
+
+engines = {
+    'wick_fields_fast': wick.wick_fields_fast,
+    'wick_fields_fast_v0': wick.wick_fields_fast_v0,
+    'wick_fields_fast_v1': wick.wick_fields_fast_v1,
+}
+
+def random_fields(rng, npairs, positions='xyzw', ns=None):
+    # a random product of npairs fields and the fields they contract with, mixing
+    # real and complex scalars, photons, spinors and quarks, in random order
+    ns = ns or Namespace('fuzz')
+    flavors = []
+    for k in range(rng.randint(1, 3)):
+        id, kind = ns.new(), rng.choice(['real', 'complex', 'photon', 'spinor', 'quark'])
+        flavors.append((id, kind, f'f_{k}'))
+
+    def index(kind):
+        x = rng.choice(positions)
+        if kind == 'photon':
+            return {'pos': x, 'lorentz': rng.choice([r'\mu', r'\nu'])}
+        if kind == 'spinor':
+            return {'pos': x, 'spin': rng.choice('ab')}
+        if kind == 'quark':
+            return {'pos': x, 'spin': rng.choice('ab'), 'color': rng.choice('ij')}
+        return {'pos': x}
+
+    fields = []
+    for _ in range(npairs):
+        id, kind, tag = rng.choice(flavors)
+        if kind in ('real', 'photon'):
+            linestyle = 'squiggle' if kind == 'photon' else 'default'
+            fields += [RealField(id, tag, index(kind), linestyle) for _ in range(2)]
+        else:
+            boson = kind == 'complex'
+            fields += [
+                ComplexField(id, tag, False, boson, index(kind)),
+                ComplexField(id, rf'\bar{{{tag}}}', True, boson, index(kind)),
+            ]
+    rng.shuffle(fields)
+    return fields
+
+def canonical(contractions, fields):
+    # pairs of real fields are unordered, complex ones always open on the
+    # non-conjugated field
+    out = {}
+    for c in contractions:
+        pairs = frozenset(
+            tuple(sorted(p)) if not hasattr(fields[p[0]], 'anti') else tuple(p)
+            for p in c.pairs
+        )
+        if pairs in out:
+            raise AssertionError(f'contraction {sorted(pairs)} produced twice')
+        out[pairs] = c.sign
+    return out
+
+def timed(engine, fields):
+    t0 = time.perf_counter()
+    out = engine(fields)
+    return out, time.perf_counter() - t0
+
+def fuzz(n=100, seed=0, max_pairs=4, engines=engines, oracle=wick.wick_fields):
+    # returns one record per random product with the number of fields, of terms
+    # and the timing of every engine relative to the oracle; raises on the first
+    # product where an engine disagrees with the oracle
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        fields = random_fields(rng, rng.randint(1, max_pairs))
+        expected, t_ref = timed(oracle, fields)
+        expected = canonical(expected, fields)
+
+        record = {'fields': len(fields), 'terms': len(expected), 'ratio': {}}
+        for name, engine in engines.items():
+            result, t = timed(engine, fields)
+            result = canonical(result, fields)
+            if result != expected:
+                product = ' * '.join(map(str, fields))
+                raise AssertionError(f'{name} differs from the reference on {product}: {result} != {expected}')
+            record['ratio'][name] = t / t_ref if t_ref > 0 else float('inf')
+        records.append(record)
+    return records
@@ -0,0 +1,77 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+from itertools import combinations_with_replacement
+from math import factorial
+
+from .algebra import Product, Sum, CNumber
+from .topology import Topology
+from .utils import Label
+
+__all__ = [
+    "perturbative",
+]
+
+# expectation values with exp(-S_int), S_int = sum_z vertex(z), expanded order by
+# order: the n-th order is (-1)^n / n! expr * vertex(z_1) ... vertex(z_n). The
+# vertices are identical up to the relabeling of their points, so the n! orderings
+# are never contracted separately: the terms of the vertex are distributed over
+# the points as multisets, with multinomial weights, and only one contraction per
+# orbit of the exchange of equal vertices is built, with its symmetry factor
+
+def labels(expr):
+    # every label carried by the fields of expr, kept fixed in the expansion
+    out = set()
+    for term in expr.tolist(Sum):
+        for f in (term.data if isinstance(term, Product) else [term]):
+            for val in getattr(f, 'index', {}).values():
+                for l in (val if isinstance(val, tuple) else (val,)):
+                    if not l is None:
+                        out.add(Label.of(l))
+    return out
+
+def vacuum(term, external):
+    # a connected component without external points is a vacuum bubble
+    return any(not any(x in external for x in c) for c in Topology(term).components)
+
+def order(expr, vertex, n, points, fixed, connected, orbits):
+    vertices = [vertex(z).tolist(Sum) for z in points]
+    terms = []
+    for choice in combinations_with_replacement(range(len(vertices[0]) if n else 1), n):
+        weight = 1
+        for j in set(choice):
+            weight *= factorial(choice.count(j))
+        prefactor = CNumber((-1) ** n, weight)
+        v = Product([vertices[i][j] for i, j in enumerate(choice)])
+        for e in expr.tolist(Sum):
+            for t in (prefactor * e * v).tolist(Sum):
+                t = t if isinstance(t, Product) else Product([t])
+                for term in t.wick_terms(orbits, fixed):
+                    if not (connected and vacuum(term, fixed)):
+                        terms.append(term)
+    return terms
+
+def perturbative(expr, vertex, order_max, points=None, connected=True, orbits=True):
+    # sum of the orders 0 ... order_max; vertex(z) returns the interaction term at
+    # point z, with its coupling. With connected, diagrams with vacuum bubbles are
+    # dropped, as they cancel against the normalization <exp(-S_int)>. Without
+    # orbits every contraction is built, related diagrams are left to simplify
+    points = [f'z_{{{i + 1}}}' for i in range(order_max)] if points is None else list(points)
+    if len(points) < order_max:
+        raise ValueError(f'{order_max} points are needed, {len(points)} given')
+    fixed = labels(expr)
+    terms = []
+    for n in range(order_max + 1):
+        terms.extend(order(expr, vertex, n, points[:n], fixed, connected, orbits))
+    return Sum(terms)
@@ -14,8 +14,8 @@
 
 from __future__ import annotations
 
-from .algebra import Base
-from .utils import default
+from .algebra import Base, Interned
+from .utils import Label
 
 __all__ = [
     "RealField",
@@ -23,16 +23,38 @@ __all__ = [
     "Propagator",
 ]
 
-class RealField(Base):
+# fields and propagators are interned and immutable, operations return new nodes;
+# index values are interned labels
+
+def labels(index):
+    return {key: Label.of(val) for key, val in index.items()}
+
+class RealField(Base, metaclass=Interned):
     def __init__(self, id: int, tag: str, index: dict = {}, linestyle = 'default'):
         self.id = id
         self.tag = tag
         self.boson = True
-        self.index = index
+        self.index = labels(index)
         self.linestyle = linestyle
+        self.strings = {}
+
+    def key(id, tag, index={}, linestyle='default'):
+        return id, tag, tuple(labels(index).items()), linestyle
+
+    def __reduce__(self):
+        return type(self), (self.id, self.tag, self.index, self.linestyle)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __str__(self):
-        # tags = ''.join(f'{self.index[key]}, ' for key in self.index if default.verbose[key])
+        return self.render()
+
+    def format(self, hide, latex):
+        # fields always show all their indices
         tags = ''.join(f'{self.index[key]}, ' for key in self.index)
         return f'{self.tag}({tags[:-2]})'
 
@@ -45,10 +67,7 @@ class RealField(Base):
         return self.id == other.id
 
     def contract(self, other):
-        p = Propagator(self, other)
-        p.symmetric = True
-        p.linestyle = self.linestyle
-        return p
+        return Propagator.between(self, other, True, self.linestyle)
 
 class ComplexField(RealField):
     def __init__(self, id: int, tag: str, anti: bool, boson: bool, index: dict = {}, linestyle = 'default'):
@@ -56,8 +75,15 @@ class ComplexField(RealField):
         self.tag = tag
         self.anti = anti
         self.boson = boson
-        self.index = index
+        self.index = labels(index)
         self.linestyle = linestyle
+        self.strings = {}
+
+    def key(id, tag, anti, boson, index={}, linestyle='default'):
+        return id, tag, anti, boson, tuple(labels(index).items()), linestyle
+
+    def __reduce__(self):
+        return ComplexField, (self.id, self.tag, self.anti, self.boson, self.index, self.linestyle)
         
     def can_be_contracted(self, other):
         if self.id == other.id:
@@ -65,38 +91,50 @@ class ComplexField(RealField):
         return False
 
     def contract(self, other):
-        p = Propagator(self, other)
-        p.linestyle = self.linestyle
-        return p
+        return Propagator.between(self, other, False, self.linestyle)
             
-class Propagator(Base):
-    def __init__(self, fx, fy):
-        self.fx = fx
-        self.fy = fy
-        self.symmetric = False
-
-        if fx.tag=='G':
-            self.tag = r'\gamma'
-        else:
-            self.tag = f'S_{{{fx.tag}}}'
-        
-        self.index = {}
-        for key in fx.index:
-            self.index[key] = [fx[key], fy[key]]
-        
-        self.linestyle = 'default'
+class Propagator(Base, metaclass=Interned):
+    def __init__(self, tag, index: dict, symmetric = False, linestyle = 'default', gamma = False, dagger = False):
+        # dagger marks the hermitian conjugate of the propagator with the
+        # positions of pos, as a matrix in all the other indices
+        self.tag = tag
+        self.index = {key: tuple(map(Label.of, val)) for key, val in index.items()}
+        self.symmetric = symmetric
+        self.linestyle = linestyle
+        self.gamma = gamma
+        self.dagger = dagger
+        self.stripes = {}
+        self.strings = {}
+
+    @classmethod
+    def between(cls, fx, fy, symmetric = False, linestyle = 'default'):
+        gamma = fx.tag=='G'
+        tag = r'\gamma' if gamma else f'S_{{{fx.tag}}}'
+        return cls(tag, {key: (fx[key], fy[key]) for key in fx.index}, symmetric, linestyle, gamma)
+
+    def key(tag, index, symmetric=False, linestyle='default', gamma=False, dagger=False):
+        return tag, tuple((key, tuple(map(Label.of, val))) for key, val in index.items()), symmetric, linestyle, gamma, dagger
+
+    def __reduce__(self):
+        return type(self), (self.tag, self.index, self.symmetric, self.linestyle, self.gamma, self.dagger)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __str__(self):
-        if self.fx.tag == 'G':
-            for key in self.index:
-                if default.verbose[key]:
-                    if key == 'lorentz':
-                        tags = rf'_{{{self.index[key][0]}}}'
-                    else:
-                        tags += f'({self.index[key][0]}, {self.index[key][1]})'
-        else:
-            tags = ''.join(f'({self.index[key][0]}, {self.index[key][1]})' for key in self.index if default.verbose[key])
-        return f'{self.tag}{tags}'
+        return self.render()
+
+    def format(self, hide, latex):
+        # gamma matrices show their lorentz index as a subscript
+        tags = ''
+        for key, (a, b) in self.index.items():
+            if not key in hide:
+                tags += rf'_{{{a}}}' if self.gamma and key == 'lorentz' else f'({a}, {b})'
+        dagger = r'^\dagger' if self.dagger else ''
+        return f'{self.tag}{dagger}{tags}'
 
     def __getitem__(self, idx):
         if idx in self.index:
@@ -104,28 +142,29 @@ class Propagator(Base):
         return (None, None)
         
     def _replace(self, rdict):
-        if self.tag in rdict:
-            self.tag = rdict[self.tag]
-        for idx in self.index:
-            if (idx in rdict):
-                if rdict[idx][0] == self.index[idx][0]:
-                    self.index[idx][0] = rdict[idx][1]
-                if rdict[idx][0] == self.index[idx][1]:
-                    self.index[idx][1] = rdict[idx][1]
+        tag = rdict[self.tag] if self.tag in rdict else self.tag
+        index = {}
+        changed = tag != self.tag
+        for idx, (a, b) in self.index.items():
+            if idx in rdict:
+                old, new = map(Label.of, rdict[idx])
+                if old in (a, b):
+                    a = new if a == old else a
+                    b = new if b == old else b
+                    changed = True
+            index[idx] = (a, b)
+        if not changed:
+            return self
+        return type(self)(tag, index, self.symmetric, self.linestyle, self.gamma, self.dagger)
 
     def swap(self):
         if self.symmetric:
-            self.fx, self.fy = self.fy, self.fx
-            for val in self.index.values():
-                val[0], val[1] = val[1], val[0]
+            index = {key: (b, a) for key, (a, b) in self.index.items()}
+            return type(self)(self.tag, index, self.symmetric, self.linestyle, self.gamma, self.dagger)
+        return self
 
     def stripe(self, index):
-        prop = Propagator(self.fx, self.fy)
-        prop.symmetric = self.symmetric
-        prop.tag = self.tag
-        prop.index = {} # this is fixes issue of replace being called before stripe
-        for idx in self.index:
-            if not idx == index:
-                prop.index[idx] = self.index[idx]
-        return prop
-    
\ No newline at end of file
+        if not index in self.stripes:
+            rest = {idx: val for idx, val in self.index.items() if idx != index}
+            self.stripes[index] = type(self)(self.tag, rest, self.symmetric, self.linestyle, self.gamma, self.dagger)
+        return self.stripes[index]
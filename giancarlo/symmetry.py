@@ -0,0 +1,178 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+from .qft import Propagator
+from .color import ColorTensor
+from .utils import Label
+
+__all__ = [
+    "LabelSymmetry",
+]
+
+# label permutations mapping a product of factors onto itself. Field ids are
+# treated as labels too, so that the private ids of two gamma matrices can be
+# exchanged, while the tags keep different flavors apart
+
+def describe(f):
+    # shape of a factor and the possible orderings of its labelled slots
+    if hasattr(f, 'can_be_contracted'):
+        shape = (type(f), f.tag, getattr(f, 'anti', None), f.boson, f.linestyle, tuple(f.index))
+        return shape, [[('id', f.id)] + list(f.index.items())]
+    if isinstance(f, Propagator):
+        shape = (type(f), f.tag, f.symmetric, f.linestyle, f.gamma, f.dagger, tuple(f.index))
+        slots = [[(key, a) for key, (a, _) in f.index.items()], [(key, b) for key, (_, b) in f.index.items()]]
+        out = [slots[0] + slots[1]]
+        if f.symmetric:
+            out.append(slots[1] + slots[0])
+        return shape, out
+    if isinstance(f, ColorTensor):
+        shape = (type(f), f.kind, f.shown)
+        kind = {i: idx for idx in ('color', 'adjoint') for i in f.slots(idx)}
+        out = [[(kind[i], l) for i, l in enumerate(f.labels)]]
+        if f.symmetric:
+            out.append(out[0][::-1])
+        return shape, out
+    # anything else can only be mapped onto itself
+    return f, [[]]
+
+def automorphisms(factors, fixed=()):
+    # all pairs (perm, mapping) with perm a permutation of the factors and
+    # mapping a relabeling {index: {old: new}} such that the relabeled factor i
+    # is factor perm[i]; labels in fixed are never moved
+    desc = [describe(f) for f in factors]
+    fixed = {Label.of(x) for x in fixed}
+    n = len(factors)
+    fwd = {}
+    bwd = {}
+    perm = [None] * n
+    used = [False] * n
+    out = []
+
+    def bind(src, dst):
+        # extends the relabeling, returns the new bindings or None on a conflict
+        new = []
+        for (k, a), (_k, b) in zip(src, dst):
+            if k != _k or (k != 'id' and a in fixed and a != b):
+                break
+            if fwd.get((k, a), b) != b or bwd.get((k, b), a) != a:
+                break
+            if not (k, a) in fwd:
+                fwd[k, a] = b
+                bwd[k, b] = a
+                new.append((k, a, b))
+        else:
+            return new
+        unbind(new)
+        return None
+
+    def unbind(new):
+        for k, a, b in new:
+            del fwd[k, a]
+            del bwd[k, b]
+
+    def search(i):
+        if i == n:
+            mapping = {}
+            for (k, a), b in fwd.items():
+                if k != 'id' and a != b:
+                    mapping.setdefault(k, {})[a] = b
+            out.append((tuple(perm), mapping))
+            return
+        shape, (src, *_) = desc[i]
+        for j in range(n):
+            if used[j] or desc[j][0] != shape:
+                continue
+            for dst in desc[j][1]:
+                new = bind(src, dst)
+                if new is None:
+                    continue
+                perm[i] = j
+                used[j] = True
+                search(i + 1)
+                used[j] = False
+                unbind(new)
+
+    search(0)
+    return out
+
+def classes(fields):
+    # positions of the fields that are exchanged freely: bosons of the same kind
+    # with the same labels. Fermions stay alone, as their exchange is odd
+    out = {}
+    for i, f in enumerate(fields):
+        key = (f.id, getattr(f, 'anti', None), tuple(f.index.items())) if f.boson else i
+        out.setdefault(key, []).append(i)
+    return list(out.values())
+
+def normalize(pairs, perm=None):
+    if perm is None:
+        return tuple(sorted(tuple(sorted(p)) for p in pairs))
+    return tuple(sorted(tuple(sorted((perm[i], perm[j]))) for i, j in pairs))
+
+def parity(perm, positions):
+    # sign of the reordering of the fermions induced by perm
+    p = [perm[i] for i in positions]
+    inversions = sum(1 for a in range(len(p)) for b in range(a + 1, len(p)) if p[a] > p[b])
+    return -1 if inversions % 2 else 1
+
+class Orbits:
+    # one representative contraction per orbit of the symmetry group of the
+    # fields: the contraction c and its images perm(c) have Wick signs related
+    # by sign(perm(c)) = parity(perm) * sign(c), so the coefficient of the whole
+    # orbit is known from the representative alone. The exchanges inside the
+    # classes of identical fields are counted by wick_classes, here the group
+    # only permutes the classes, with the contractions seen as multigraphs of them
+    def __init__(self, table, classes, others=(), fixed=()):
+        n = len(classes)
+        fermions = [c for c in range(n) if not table.boson[classes[c][0]]]
+        self.cls = {i: c for c, members in enumerate(classes) for i in members}
+        perms = {}
+        for perm, _ in automorphisms([table.fields[m[0]] for m in classes] + list(others), fixed):
+            perm = perm[:n]
+            if all(len(classes[c]) == len(classes[perm[c]]) for c in range(n)):
+                perms.setdefault(perm, parity(perm, fermions))
+        self.perms = list(perms.items())
+
+    def __call__(self, pairs, sign):
+        # coefficient of the orbit if pairs is its representative, else None
+        pairs = [(self.cls[i], self.cls[j]) for i, j in pairs]
+        key = normalize(pairs)
+        images = {}
+        for perm, parity in self.perms:
+            image = normalize(pairs, perm)
+            if image < key:
+                return None
+            images[image] = parity
+        return sign * sum(images.values())
+
+class LabelSymmetry:
+    # simultaneous relabeling of any number of labels, usable in simplify
+    def __init__(self, mapping):
+        self.mapping = {k: {Label.of(a): Label.of(b) for a, b in v.items()} for k, v in mapping.items()}
+
+    def __eq__(self, other):
+        return isinstance(other, LabelSymmetry) and self.mapping == other.mapping
+
+    def __repr__(self):
+        return f'LabelSymmetry({self.mapping})'
+
+    def __call__(self, target):
+        # labels are first moved to temporaries, so that cycles do not collide
+        for k, v in self.mapping.items():
+            for i, a in enumerate(v):
+                target = target.replace({k: [a, f'aaaaa{k}{i}']})
+        for k, v in self.mapping.items():
+            for i, b in enumerate(v.values()):
+                target = target.replace({k: [f'aaaaa{k}{i}', b]})
+        return target
@@ -0,0 +1,61 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+import numpy as np
+
+__all__ = [
+    "FieldTable",
+]
+
+class FieldTable:
+    # columnar view of a list of fields: dense field ids, anti and boson flags
+    # and one column of interned labels per index type (-1 if missing)
+    def __init__(self, fields):
+        self.fields = list(fields)
+        n = len(self.fields)
+
+        ids = {}
+        self.id = np.array([ids.setdefault(f.id, len(ids)) for f in self.fields], dtype=np.int64)
+        self.anti = np.array([getattr(f, 'anti', False) for f in self.fields], dtype=bool)
+        self.boson = np.array([f.boson for f in self.fields], dtype=bool)
+        self.real = np.array([not hasattr(f, 'anti') for f in self.fields], dtype=bool)
+
+        self.index = {}
+        for i, f in enumerate(self.fields):
+            for key, val in f.index.items():
+                if not key in self.index:
+                    self.index[key] = np.full(n, -1, dtype=np.int64)
+                if not val is None:
+                    self.index[key][i] = val
+
+    def __len__(self):
+        return len(self.fields)
+
+    def compatible(self):
+        # compatible[i, j] if field i contracts with field j, in this order
+        same = self.id[:, None] == self.id[None, :]
+        np.fill_diagonal(same, False)
+        return same & (self.real[:, None] | (~self.anti[:, None] & self.anti[None, :]))
+
+    def balanced(self):
+        # a full contraction exists only if every real field appears an even
+        # number of times and every complex field as often as its conjugate
+        n = np.bincount(self.id, minlength=len(np.unique(self.id))) if len(self) else np.zeros(0, dtype=np.int64)
+        anti = np.bincount(self.id, weights=self.anti, minlength=len(n))
+        real = np.bincount(self.id, weights=self.real, minlength=len(n)) > 0
+        return bool(np.all(np.where(real, n % 2 == 0, 2 * anti == n)))
+
+    def fermions(self):
+        # bit i is set for fermionic fields
+        return sum(1 << int(i) for i in np.flatnonzero(~self.boson))
@@ -0,0 +1,204 @@
+#
+# Copyright (C) 2025 Mattia Bruno
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+
+from .draw import Diagram
+from .utils import Label
+
+__all__ = [
+    "Topology",
+    "UniqueTopology",
+]
+
+class UnionFind:
+    def __init__(self):
+        self.parent = []
+        self.size = []
+        self.ids = {}
+
+    def add(self, x):
+        if not x in self.ids:
+            self.ids[x] = len(self.parent)
+            self.parent.append(len(self.parent))
+            self.size.append(1)
+        return self.ids[x]
+
+    def find(self, i):
+        # path halving, no recursion
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return i
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+        return i
+
+
+def propagators(factors):
+    # flattens contracted products, keeps only the propagators carrying a position
+    out = []
+    stack = list(reversed(factors))
+    while stack:
+        f = stack.pop()
+        if hasattr(f, 'factors'):
+            stack.extend(reversed(f.factors))
+        elif f['pos'] != (None, None):
+            out.append(f)
+    return out
+
+def lines(factors):
+    # quark lines (traces and open chains) are kept together, everything else
+    # is split into single propagators
+    out = []
+    stack = list(reversed(factors))
+    while stack:
+        f = stack.pop()
+        if hasattr(f, 'factors'):
+            a, b = f.open_indices
+            if a is None and b is None:
+                stack.extend(reversed(f.factors))
+                continue
+            props = propagators(f.factors)
+            if props:
+                out.append((('trace' if a == b else 'line', len(props)), props))
+        elif f['pos'] != (None, None):
+            out.append((('prop', f.linestyle), [f]))
+    return out
+
+
+class Topology:
+    def __init__(self, term):
+        data = term.data if hasattr(term, 'data') else list(term)
+        self.lines = lines(data)
+
+        uf = UnionFind()
+        for _, props in self.lines:
+            i = None
+            for p in props:
+                for x in p['pos']:
+                    j = uf.add(x)
+                    i = j if i is None else uf.union(i, j)
+
+        # components in order of first appearance
+        roots = {}
+        self.components = []
+        self.pieces = []
+        for desc, props in self.lines:
+            r = uf.find(uf.ids[props[0]['pos'][0]])
+            if not r in roots:
+                roots[r] = len(self.components)
+                self.components.append([])
+                self.pieces.append([])
+            self.pieces[roots[r]].append((desc, props))
+        for x in uf.ids:
+            self.components[roots[uf.find(uf.ids[x])]].append(x)
+
+        # the graph itself: propagators as unordered pairs of positions with their
+        # linestyle, positions are external labels so no relabeling is needed
+        self.signature = tuple(sorted([
+            (tuple(sorted(p['pos'], key=str)), p.linestyle)
+            for _, props in self.lines for p in props
+        ], key=str))
+
+        self.label = tuple(sorted(
+            (len(pos), tuple(sorted(desc for desc, _ in piece)))
+            for pos, piece in zip(self.components, self.pieces)
+        ))
+
+    def __len__(self):
+        return len(self.components)
+
+    def __hash__(self):
+        return hash(self.label)
+
+    def __eq__(self, other):
+        return isinstance(other, Topology) and self.label == other.label
+
+    def __repr__(self):
+        return f'Topology({self.label})'
+
+    def propagators(self):
+        return [[p for _, props in piece for p in props] for piece in self.pieces]
+
+    def diagram(self):
+        return [[(*p['pos'], p.linestyle) for p in props] for props in self.propagators()]
+
+    def connected(self, *positions):
+        positions = [Label(x) for x in positions]
+        return any(all(x in pos for x in positions) for pos in self.components)
+
+    def group(terms):
+        groups = {}
+        for i, t in enumerate(terms):
+            groups.setdefault(Topology(t).label, []).append(i)
+        return groups
+
+    def unique(terms):
+        groups = {}
+        for t in terms:
+            topo = Topology(t)
+            if not topo.signature in groups:
+                groups[topo.signature] = UniqueTopology(topo)
+            groups[topo.signature].terms.append(t)
+        return list(groups.values())
+
+
+class UniqueTopology:
+    def __init__(self, topology):
+        self.topology = topology
+        self.terms = []
+
+    def __len__(self):
+        return len(self.terms)
+
+    @property
+    def coefficient(self):
+        # sum of the prefactors, a term without one counts as 1; a plain number
+        # unless some prefactors carry symbols
+        from .algebra import CNumber, Product, Sum
+        numbers, symbols = {}, {}
+        for t in self.terms:
+            key = tuple(str(f) for f in t.symb + t.sum)
+            symbols[key] = t.symb + t.sum
+            numbers[key] = numbers.get(key, CNumber(0)) + (CNumber.reduce(t.cnum)[0] if t.cnum else CNumber(1))
+        if list(numbers) == [()]:
+            return numbers[()]
+        return Sum([Product([n] + symbols[k]) for k, n in numbers.items() if n != 0])
+
+    @property
+    def count(self):
+        return f'{len(self)} term' + ('' if len(self) == 1 else 's')
+
+    def render(self, latex=None):
+        # a unit coefficient is printed as a sign only, the 1 is put back
+        out = self.coefficient.render(latex=latex)
+        return f'{out}1' if out in ('', '-') else out
+
+    def diagram(self, title=''):
+        if title == '':
+            title = f'{self.count} : ${self.render(latex=True)}$'
+        return self.topology.diagram(), title
+
+    def draw(self, title=''):
+        connected, title = self.diagram(title)
+        Diagram(len(connected)).draw(connected, title)
+
+    def __str__(self):
+        return f'{self.count} : {self.render()}'
@@ -13,9 +13,14 @@
 #
 
 import builtins
+import threading
+from weakref import WeakValueDictionary
+from contextvars import ContextVar
 
 __all__ = [
     "default",
+    "Namespace",
+    "Label",
     "print"
 ]
 
@@ -25,10 +30,108 @@ def inside_ipython():
         return get_ipython() is not None
     except ImportError:
         return False
-    
+
+class Namespace:
+    # deterministic field ids and variable labels; ids and labels of a named
+    # namespace carry its name, so expressions built by different workers
+    # (each with its own namespace) never collide when they are merged
+    def __init__(self, name=None):
+        self.name = name
+        self.field_id = 0
+        self.var_id = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def new(self):
+        with self.lock:
+            self.field_id += 1
+            n = self.field_id
+        return n if self.name is None else (self.name, n)
+
+    def var(self):
+        with self.lock:
+            self.var_id += 1
+            n = self.var_id
+        return f'x_{{{n}}}' if self.name is None else f'x_{{{self.name},{n}}}'
+
+    def __enter__(self):
+        if not hasattr(self.local, 'tokens'):
+            self.local.tokens = []
+        self.local.tokens.append(current_namespace.set(self))
+        return self
+
+    def __exit__(self, *args):
+        current_namespace.reset(self.local.tokens.pop())
+
+    def __getstate__(self):
+        return {'name': self.name, 'field_id': self.field_id, 'var_id': self.var_id}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'])
+        self.field_id = state['field_id']
+        self.var_id = state['var_id']
+
+    def __repr__(self):
+        return f'Namespace({self.name!r})'
+
+class Label:
+    # index labels (positions, spin, lorentz and color indices) interned to one
+    # instance per name, compared and hashed by identity. The dense integer of a
+    # label is its index in the columns of FieldTable; labels that are no longer
+    # used leave the table and give their integer to the next new name. Strings
+    # are converted with Label.of where they enter, a label is never equal to one
+    __slots__ = ('id', 'name', '__weakref__')
+    table = WeakValueDictionary()
+    free = []
+    count = 0
+    lock = threading.Lock()
+
+    def __new__(cls, name):
+        if isinstance(name, Label):
+            return name
+        label = cls.table.get(name)
+        if label is None:
+            with cls.lock:
+                label = cls.table.get(name)
+                if label is None:
+                    label = object.__new__(cls)
+                    if cls.free:
+                        label.id = cls.free.pop()
+                    else:
+                        label.id = cls.count
+                        cls.count += 1
+                    label.name = name
+                    cls.table[name] = label
+        return label
+
+    def __del__(self):
+        type(self).free.append(self.id)
+
+    def of(value):
+        if value is None or type(value) is Label:
+            return value
+        return Label(value)
+
+    def __index__(self):
+        return self.id
+
+    __int__ = __index__
+
+    def __str__(self):
+        return str(self.name)
+
+    def __format__(self, spec):
+        return format(str(self), spec)
+
+    def __repr__(self):
+        return repr(self.name)
+
+    def __reduce__(self):
+        return Label, (self.name,)
+
+current_namespace = ContextVar('namespace', default=Namespace())
+
 class default:
-    field_id = 0
-    var_id = 0
     indices = ['spin', 'lorentz', 'color']
     verbose = {
         'pos': True,
@@ -39,15 +142,17 @@ class default:
     debug = [] #'wick', 'simplify']
     latex = inside_ipython()
 
+    @classmethod
+    def namespace(cls):
+        return current_namespace.get()
+
     @classmethod
     def new(cls):
-        cls.field_id += 1
-        return cls.field_id
+        return current_namespace.get().new()
 
     @classmethod
     def var(cls):
-        cls.var_id += 1
-        return f'x_{{{cls.var_id}}}'
+        return current_namespace.get().var()
 
 
 def init_printer():
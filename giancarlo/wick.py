@@ -12,11 +12,13 @@
 # GNU General Public License for more details.
 #
 
-from itertools import permutations
-from collections import Counter
+from itertools import permutations, combinations
+from collections import Counter, deque
 from functools import reduce
 from operator import mul
-from .utils import default
+from math import factorial
+from .table import FieldTable
+import numpy as np
 
 class Contraction:
     def __init__(self, fields, pairs = [], sign = 1):
@@ -53,42 +55,148 @@ class Contraction:
             self._tag = tuple(sorted(tuple(sorted(t)) for t in self.pairs))
         return self._tag
 
-def wick_fields(expr):
-    idx = list(range(expr.size))
-
-    stack = []
+def wick_fields(factors):
+    # reference enumeration over all orderings of the fields: the sign is the
+    # parity of the permutation of the fermions, slow but simple
+    n = len(factors)
+    stack = set()
     contractions = []
-    n = len(idx)
     if (n%2)>0:
-        raise
+        return contractions
     
-    ip = 0
-    for p in permutations(idx):
-        _c = Contraction(expr.factors)
-        for i in range(0, n, 2):
-            pi = p[i]
-            pj = p[i+1]
-            if expr.factors[pi].can_be_contracted(expr.factors[pj]):
-                _c.append(pi, pj)
-            else:
-                _c.append(pi)
-                _c.append(pj)
-                break
+    for p in permutations(range(n)):
+        pairs = [(p[i], p[i+1]) for i in range(0, n, 2)]
+        if not all(factors[i].can_be_contracted(factors[j]) for i, j in pairs):
+            continue
 
-        # checks for left-over uncontracted fields
-        if _c.fully_contracted:
-            if _c.tag not in stack:
-                stack.append(_c.tag)
-                contractions.append(_c)
-        
-            ip += 1
-            if 'wick' in default.debug:
-                log.debug(f'{ip} / {len(idx)}')
+        _c = Contraction(factors, pairs)
+        if _c.tag in stack:
+            continue
+        stack.add(_c.tag)
+
+        fermions = [i for i in p if not factors[i].boson]
+        inversions = sum(1 for a, b in combinations(fermions, 2) if a > b)
+        _c.sign = -1 if inversions % 2 else 1
+        contractions.append(_c)
 
     return contractions
 
 
+def popcount(x):
+    return bin(x).count('1')
+
+def initial(n):
+    # search stack of a fresh enumeration of n fields
+    return [((1 << n) - 1, (), 1)]
+
+def wick_stream(table, mask=None, stack=None):
+    # every complete contraction is produced once: the first remaining field
+    # that can open a propagator (real, or not anti) is paired with each of its
+    # remaining partners in ascending order. Remaining fields are a bitmask and
+    # the sign is the parity of the fermions crossed when moving the pair next
+    # to each other. Contractions are generated one at a time; an optional
+    # boolean mask restricts the allowed pairs. The search stack can be given,
+    # it is consumed in place so that a copy taken between two contractions
+    # resumes the enumeration
+    if not table.balanced():
+        return
+
+    compatible = table.compatible() if mask is None else table.compatible() & mask
+    partners = [np.flatnonzero(row).tolist() for row in compatible]
+    opens = [bool(p) for p in partners]
+    fermions = table.fermions()
+
+    stack = initial(len(table)) if stack is None else stack
+    while stack:
+        remaining, pairs, sign = stack.pop()
+        if not remaining:
+            yield list(pairs), sign
+            continue
+        i = 0
+        while i < len(opens) and (not (remaining >> i) & 1 or not opens[i]):
+            i += 1
+        if i == len(opens):
+            continue
+        for j in reversed(partners[i]):
+            if not (remaining >> j) & 1:
+                continue
+            _sign = sign
+            if fermions >> i & 1:
+                if j > i:
+                    between = remaining & ((1 << j) - (1 << (i + 1)))
+                else:
+                    between = remaining & ((1 << (i + 1)) - (1 << (j + 1)))
+                if popcount(between & fermions) & 1:
+                    _sign = -sign
+            stack.append((remaining & ~(1 << i) & ~(1 << j), pairs + ((i, j),), _sign))
+
+def wick_classes(table, classes, stack=None):
+    # one contraction per multigraph of classes of identical fields, i.e. per
+    # orbit of the exchanges of the fields inside a class. The smallest remaining
+    # field of the first class with remaining fields is paired with the smallest
+    # remaining field of a class not before the partner class of the previous
+    # pair of the same class, so that the edges of every class come out sorted.
+    # The sign is multiplied by the size of the orbit; same stack as wick_stream
+    if not table.balanced():
+        return
+
+    compatible = table.compatible()
+    fermions = table.fermions()
+    cls = [0] * len(table)
+    masks = []
+    for c, members in enumerate(classes):
+        masks.append(sum(1 << i for i in members))
+        for i in members:
+            cls[i] = c
+
+    stack = initial(len(table)) if stack is None else stack
+    while stack:
+        remaining, pairs, sign = stack.pop()
+        if not remaining:
+            edges = Counter(tuple(sorted((cls[i], cls[j]))) for i, j in pairs)
+            size = reduce(mul, (factorial(len(m)) for m in classes), 1)
+            for (c, d), m in edges.items():
+                size //= factorial(m) * (2 ** m if c == d else 1)
+            # in the order of wick_stream, by opening field
+            yield sorted(pairs), contraction_sign(pairs, fermions) * size
+            continue
+        a = next(c for c, m in enumerate(masks) if remaining & m)
+        first = a
+        if pairs:
+            c, d = sorted((cls[pairs[-1][0]], cls[pairs[-1][1]]))
+            first = d if c == a else a
+        i = (remaining & masks[a] & -(remaining & masks[a])).bit_length() - 1
+        rest = remaining & ~(1 << i)
+        for d in reversed(range(first, len(classes))):
+            if not rest & masks[d]:
+                continue
+            j = (rest & masks[d] & -(rest & masks[d])).bit_length() - 1
+            if compatible[i, j]:
+                stack.append((rest & ~(1 << j), pairs + ((i, j),), sign))
+            elif compatible[j, i]:
+                stack.append((rest & ~(1 << j), pairs + ((j, i),), sign))
+
+def contraction_sign(pairs, fermions):
+    # sign of a complete contraction from the positions alone: one factor -1 for
+    # every fermion propagator whose anti field comes first and for every two
+    # fermion propagators crossing each other
+    spans = []
+    n = 0
+    for i, j in pairs:
+        if fermions >> i & 1:
+            n += i > j
+            spans.append((i, j) if i < j else (j, i))
+    n += sum(1 for a, b in spans for c, d in spans if a < c < b < d)
+    return -1 if n % 2 else 1
+
+def wick_table(table):
+    return list(wick_stream(table))
+
 def wick_fields_fast(factors):
+    table = FieldTable(factors)
+    return [Contraction(table.fields, pairs, sign) for pairs, sign in wick_table(table)]
+
+def wick_fields_fast_v1(factors):
     contractions = []
     stack = []
 
@@ -147,7 +255,6 @@ def wick_fields_fast_v0(factors):
                 if _c.tag not in stack:
                     stack.append(_c.tag)
                     contractions.append(_c)
-                    print(len(contractions))
             return 
         
         # for jr, j in enumerate(remaining):
@@ -163,26 +270,26 @@ def wick_fields_fast_v0(factors):
         #         backtrack([k for k in remaining if k not in (i, j)], paired, sign * _sign)
         #         paired.pop()
 
-        for j, f0 in enumerate(remaining):
-            for i, f1 in enumerate(remaining):
+        # remaining holds positions, interned fields repeat in factors
+        for j, i0 in enumerate(remaining):
+            for i, i1 in enumerate(remaining):
                 if i==j:
                     continue
 
-                if f0.can_be_contracted(f1):
-                    i0 = factors.index(f0)
-                    i1 = factors.index(f1)
+                f0 = factors[i0]
+                if f0.can_be_contracted(factors[i1]):
                     paired.append((i0,i1))
                     _sign = 1
                     if not f0.boson:
                         if i>j:
-                            _sign = get_sign(remaining[j+1:i])
+                            _sign = get_sign([factors[k] for k in remaining[j+1:i]])
                         else:
-                            _sign = get_sign(remaining[i+1:j+1])
+                            _sign = get_sign([factors[k] for k in remaining[i+1:j+1]])
                     
-                    backtrack([f for f in remaining if f not in (f0, f1)], paired, sign * _sign)
+                    backtrack([k for k in remaining if k not in (i0, i1)], paired, sign * _sign)
                     paired.pop()
 
-    backtrack(factors, [])
+    backtrack(list(range(len(factors))), [])
     return contractions
 
 def build_trace(expr, Trace_class, indices):
@@ -286,7 +393,7 @@ def split_connected_v0(expr, indices, pairs_only = True):
                     break
                 if (f.symmetric and c.contains(1, i1)):
                     istack = j
-                    f.swap()
+                    f = f.swap()
                     break
             else:
                 if (c.contains(1, i0) or c.contains(1, i1) or c.contains(0, i0)):
@@ -312,54 +419,90 @@ class ConnectedSet:
         return [factors[i] for i in self.fidx]
 
 def split_connected(expr, index):
-    stack = []
-    paired = []
-
-    def backtrace(idx):
-        for i, f in enumerate(expr.factors):
-            if (i not in paired):
-                if (f[index][1] == idx):
-                    f.swap()
-                if (f[index][0] == idx):
-                    stack[-1].append(i)
-                    paired.append(i)
-                    backtrace(f[index][1])
+    factors = list(expr.factors)
+    ends = [tuple(f[index]) for f in factors]
+    symmetric = [getattr(f, 'symmetric', False) for f in factors]
+
+    # open index label -> factors starting (heads) or ending (tails) on it
+    heads = {}
+    tails = {}
+    for i, (a, b) in enumerate(ends):
+        if a is not None:
+            heads.setdefault(a, []).append(i)
+        if b is not None:
+            tails.setdefault(b, []).append(i)
+
+    paired = [False] * len(factors)
+
+    # first free factor attached to label, symmetric factors attached with
+    # the wrong orientation are swapped
+    def attach(label, direct, swapped):
+        for i in sorted(direct.get(label, []) + [j for j in swapped.get(label, []) if symmetric[j]]):
+            if not paired[i]:
+                paired[i] = True
+                if ends[i][0 if direct is heads else 1] != label:
+                    factors[i] = factors[i].swap()
+                    ends[i] = ends[i][::-1]
+                return i
+        return None
 
-    for i, f in enumerate(expr.factors):
-        if (i not in paired):
-            stack.append(ConnectedSet(i))
-            paired.append(i)
-            backtrace(f[index][1])
-
-    return [s(expr.factors) for s in stack]
-
-def topologies(expr):
-    fmap = {i: f['pos'] for i, f in enumerate(expr.factors)}
-
-    pmap = {}
-    for i, positions in fmap.items():
-        for p in positions:
-            pmap.setdefault(p, []).append(i)
-
-    visited = set()
-    connected = []
-
-    def explore(i, c):
-        visited.add(i)
-        c.append(i)
-
-        # For every position of this factor
-        for p in fmap[i]:
-            # Visit all factors sharing that position
-            for j in pmap[p]:
-                if j not in visited:
-                    explore(j, c)
-
-    for i in fmap:
-        if i not in visited:
-            c = []
-            explore(i, c)
-            connected.append(c)
-
-    # Return actual factors grouped by topology
-    return [[expr.factors[i] for i in c] for c in connected]
+    stack = []
+    loose = None
+    for i, (a, b) in enumerate(ends):
+        if paired[i]:
+            continue
+        paired[i] = True
+
+        # factors without the index are collected together
+        if a is None and b is None:
+            if loose is None:
+                loose = ConnectedSet(i)
+                stack.append(loose)
+            else:
+                loose.append(i)
+            continue
+
+        chain = deque([i])
+        label = b
+        while label is not None:
+            j = attach(label, heads, tails)
+            if j is None:
+                break
+            chain.append(j)
+            label = ends[j][1]
+
+        # walks back to the head of open chains
+        label = a
+        while label is not None:
+            j = attach(label, tails, heads)
+            if j is None:
+                break
+            chain.appendleft(j)
+            label = ends[j][0]
+
+        c = ConnectedSet(chain[0])
+        for j in list(chain)[1:]:
+            c.append(j)
+        stack.append(c)
+
+    return [s(factors) for s in stack]
+
+def least_rotation(seq):
+    # Booth's algorithm, start of the lexicographically minimal rotation of seq
+    n = len(seq)
+    s = list(seq) * 2
+    f = [-1] * (2 * n)
+    k = 0
+    for j in range(1, 2 * n):
+        i = f[j - k - 1]
+        while i != -1 and s[j] != s[k + i + 1]:
+            if s[j] < s[k + i + 1]:
+                k = j - i - 1
+            i = f[i]
+        if i == -1 and s[j] != s[k + i + 1]:
+            if s[j] < s[k + i + 1]:
+                k = j
+            f[j - k] = -1
+        else:
+            f[j - k] = i + 1
+    return k % n if n else 0
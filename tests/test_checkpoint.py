@@ -0,0 +1,44 @@
+import os
+import tempfile
+import giancarlo as gc
+
+u, ubar = gc.SpinorField('u')
+
+def current(x, mu):
+    a, b = f'a_{x}', f'b_{x}'
+    return ubar(x, a) * gc.DiracGamma(mu, a, b) * u(x, b)
+
+expr = current('x', r'\mu') * current('y', r'\nu') * current('z', r'\rho')
+full = expr.wick()
+
+path = os.path.join(tempfile.mkdtemp(), 'wick.pkl')
+budget = gc.Budget(terms=2)
+partial = expr.wick(checkpoint=path, budget=budget)
+stopped = (budget.stopped, len(partial), os.path.exists(path))
+resumed = expr.wick(checkpoint=path)
+
+contracted = full.contract('spin')
+symmetry = gc.ExchangeSymmetry(pos=['x', 'y'], lorentz=[r'\mu', r'\nu'])
+merged = contracted.simplify(symmetry)
+spath = os.path.join(tempfile.mkdtemp(), 'simplify.pkl')
+spartial = contracted.simplify(symmetry, checkpoint=spath, budget=gc.Budget(terms=3))
+sresumed = contracted.simplify(symmetry, checkpoint=spath)
+
+try:
+    other = (current('x', r'\mu') * current('y', r'\nu')).wick(checkpoint=path, budget=gc.Budget(terms=1))
+    other = (current('x', r'\mu') * current('y', r'\mu')).wick(checkpoint=path)
+except ValueError as e:
+    other = 'ValueError'
+
+tests = {
+    "('terms', 2, True)": stopped,
+    str(full): resumed,
+    'False': os.path.exists(path + '.tmp') or os.path.exists(spath),
+    str(merged): sresumed,
+    '0': (spartial - contracted).simplify(),
+    'ValueError': other,
+}
+
+def test_checkpoint():
+    for key, value in tests.items():
+        assert key == str(value)
@@ -0,0 +1,58 @@
+import json
+import os
+import pickle
+import tempfile
+from giancarlo import cli
+
+job = {
+    'fields': {'u': 'quark', 'd': 'quark', 'phi': {'type': 'complex', 'tag': r'\phi'}, 'A': 'photon'},
+    'operators': {
+        'P': {'args': ['x'], 'expr': "dbar(x, a_x, c_x) * gamma('5', a_x, b_x) * u(x, b_x, c_x)"},
+        'Pdag': {'args': ['x'], 'expr': "ubar(x, a_x, c_x) * gamma('5', a_x, b_x) * d(x, b_x, c_x)"},
+        'J': {'args': ['z', 'mu'], 'expr': "CNumber(-1j) * Symbol('e') * phidag(z) * A(z, mu) * phi(z)"},
+    },
+    'expressions': {
+        'pion': "P('x') * Pdag('y')",
+        'vertex': "phi('x') * J('z1', 'alpha') * J('z2', 'beta') * phidag('y')",
+    },
+    'contract': ['spin', 'color'],
+    'symmetries': [{'pos': ['z1', 'z2'], 'lorentz': ['alpha', 'beta']}],
+}
+
+tmp = tempfile.mkdtemp()
+path = os.path.join(tmp, 'job.json')
+with open(path, 'w') as f:
+    json.dump(job, f)
+
+out, cache = os.path.join(tmp, 'out'), os.path.join(tmp, 'cache')
+argv = [path, '-o', out, '-c', cache, '-s', os.path.join(tmp, 'stats.json')]
+cli.main(argv)
+cli.main(argv)
+with open(os.path.join(tmp, 'stats.json')) as f:
+    stats = json.load(f)
+with open(os.path.join(out, 'pion.pkl'), 'rb') as f:
+    pion = pickle.load(f)
+with open(os.path.join(out, 'pion.tex')) as f:
+    tex = f.read()
+
+def rejected(source):
+    try:
+        cli.evaluate(source, cli.environment(job))
+    except (ValueError, NameError):
+        return True
+    return False
+
+tests = {
+    '2': len(os.listdir(cache)),
+    "['pion.pkl', 'pion.tex', 'vertex.pkl', 'vertex.tex']": sorted(os.listdir(out)),
+    '[True, True]': [s['cached'] for s in stats],
+    "['parse', 'wick', 'contract', 'simplify']": [s['stage'] for s in stats[1]['stages']],
+    '[1, 6, 6, 4]': [s['terms'] for s in stats[1]['stages']],
+    r'( - * \mathrm{Tr}_\mathrm{color} \big[\mathrm{Tr}_\mathrm{spin} \big[S_{d}(y, x) * \gamma_{5} * S_{u}(x, y) * \gamma_{5} \big] \big] )': pion,
+    r'pion = ( -\,\mathrm{Tr}_\mathrm{color} \big[\mathrm{Tr}_\mathrm{spin} \big[S_{d}(y, x)\,\gamma_{5}\,S_{u}(x, y)\,\gamma_{5} \big] \big] )': tex.splitlines()[1],
+    '[True, True, True]': [rejected(s) for s in ["__import__('os')", "P.__class__", "(lambda: 1)()"]],
+}
+
+def test_cli():
+    for key, value in tests.items():
+        assert key == str(value)
@@ -15,4 +15,9 @@ tests = {
 
 def test_cnumber_symbol():
     for key, value in tests.items():
-        assert key == str(value)
\ No newline at end of file
+        assert key == str(value)
+def test_cnumber_eq_hash():
+    # equal numbers hash the same, exact or not
+    for x, y in [(gc.CNumber(0.5), gc.CNumber(1, 2)), (gc.CNumber(2.5), gc.CNumber(5, 2)), (gc.CNumber(3.0), gc.CNumber(3))]:
+        assert x == y and hash(x) == hash(y) and len({x, y}) == 1
+    assert gc.CNumber(1, 3) != gc.CNumber(0.3) and gc.CNumber(1, 2) == 0.5
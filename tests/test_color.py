@@ -0,0 +1,33 @@
+import giancarlo as gc
+
+q, qbar = gc.QuarkField('u')
+
+def current(x, A):
+    a, b = f'a_{x}', f'b_{x}'
+    return qbar(x, 's', a) * gc.ColorT(A, a, b) * q(x, 's', b)
+
+def reduce(*factors):
+    out = gc.CNumber(1)
+    for f in factors:
+        out = out * f
+    return out.wick()
+
+eps = gc.ColorEpsilon
+
+tests = {
+    '( +6 )': reduce(eps('a', 'b', 'c'), eps('a', 'b', 'c')),
+    '( +2 * S_{u}(x, y)(s, s)(c, c) )': reduce(eps('a', 'b', 'c'), eps('a', 'b', 'd'), q('x', 's', 'c'), qbar('y', 's', 'd')),
+    r'( +3 * \delta^{AD} )': reduce(gc.ColorF('A', 'B', 'C'), gc.ColorF('D', 'B', 'C')),
+    '( -24 )': reduce(gc.ColorF('A', 'B', 'C'), gc.ColorF('B', 'A', 'C')),
+    '0': reduce(gc.ColorT('A', 'a', 'a'), q('x', 's', 'c'), qbar('y', 's', 'c')),
+    '( +4 )': reduce(gc.ColorT('A', 'a', 'b'), gc.ColorT('A', 'b', 'a')),
+}
+
+
+# Fierz: T^A_ab T^A_cd = (delta_ad delta_cb - delta_ab delta_cd / N) / 2
+fierz = (current('x', 'A') * current('y', 'A')).wick().contract('color')
+tests[r'( +\frac{1}{2} * \mathrm{Tr}_\mathrm{color} \big[S_{u}(x, x)(s, s) * S_{u}(y, y)(s, s) \big]-\frac{1}{6} * \mathrm{Tr}_\mathrm{color} \big[S_{u}(x, x)(s, s) \big] * \mathrm{Tr}_\mathrm{color} \big[S_{u}(y, y)(s, s) \big]-\frac{1}{2} * \mathrm{Tr}_\mathrm{color} \big[S_{u}(x, y)(s, s) \big] * \mathrm{Tr}_\mathrm{color} \big[S_{u}(y, x)(s, s) \big]+\frac{1}{6} * \mathrm{Tr}_\mathrm{color} \big[S_{u}(x, y)(s, s) * S_{u}(y, x)(s, s) \big] )'] = fierz
+
+def test_color():
+    for key, value in tests.items():
+        assert key == str(value)
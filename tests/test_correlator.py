@@ -0,0 +1,50 @@
+import random
+import giancarlo as gc
+from giancarlo.algebra import Product
+from giancarlo.fuzz import random_fields, canonical
+from giancarlo.wick import wick_fields_fast, Contraction
+from giancarlo.correlator import Operator, pairings
+
+u, ubar = gc.QuarkField('u')
+d, dbar = gc.QuarkField('d')
+
+def pion(q, qbar, x, tag):
+    a, b, c = f'a_{tag}', f'b_{tag}', f'c_{tag}'
+    return qbar(x, a, c) * gc.DiracGamma('5', a, b) * q(x, b, c)
+
+sinks = [pion(u, dbar, 'x', 'x0'), pion(u, ubar, 'x', 'x1') - pion(d, dbar, 'x', 'x2')]
+sources = [pion(d, ubar, 'y', 'y0'), pion(u, ubar, 'y', 'y1') - pion(d, dbar, 'y', 'y2')]
+C = gc.CorrelatorMatrix(sinks, sources, indices=('spin', 'color'))
+
+tests = {
+    '(2, 2)': C.shape,
+    r'( - * \mathrm{Tr}_\mathrm{color} \big[\mathrm{Tr}_\mathrm{spin} \big[S_{d}(y, x) * \gamma_{5} * S_{u}(x, y) * \gamma_{5} \big] \big] )': C[0, 0],
+    '0': C[0, 1],
+    '[[[0], []], [[], [0, 1]]]': C.which,
+    "['0', '0', '0', '0']": [str((C[i, j] - (sinks[i] * sources[j]).wick().contract('spin', 'color')).simplify()) for i in range(2) for j in range(2)],
+}
+
+# every split of a random product into sink and source gives the contractions of the whole product
+def split(rng):
+    f = random_fields(rng, rng.randint(1, 4))
+    k = rng.randint(0, len(f))
+    got = [Contraction(f, p, s) for p, s, _ in pairings(Operator(Product(f[:k])), Operator(Product(f[k:])))]
+    return canonical(got, f) == canonical(wick_fields_fast(f), f)
+
+# same for random products cut into up to four blocks
+def blocks(rng):
+    f = random_fields(rng, rng.randint(1, 4))
+    cuts = sorted(rng.randint(0, len(f)) for _ in range(rng.randint(1, 3)))
+    parts = [f[a:b] for a, b in zip([0] + cuts, cuts + [len(f)])]
+    got = [Contraction(f, p, s) for p, s, _ in pairings(*[Operator(Product(p)) for p in parts])]
+    return canonical(got, f) == canonical(wick_fields_fast(f), f)
+
+rng = random.Random(7)
+tests['True'] = all(split(rng) for _ in range(50)) and all(blocks(rng) for _ in range(50))
+
+ops = [sinks[1], sources[1], pion(u, ubar, 'z', 'z1')]
+tests['[]'] = (gc.block_wick(*ops) - (ops[0] * ops[1] * ops[2]).wick()).simplify().factors
+
+def test_correlator():
+    for key, value in tests.items():
+        assert key == str(value)
@@ -0,0 +1,61 @@
+import giancarlo as gc
+
+u, ubar = gc.SpinorField('u')
+
+def trace(*labels):
+    n = len(labels)
+    out = gc.CNumber(1)
+    for k, mu in enumerate(labels):
+        out = out * gc.DiracGamma(mu, f's_{k}', f's_{(k + 1) % n}')
+    return out.wick().contract('spin').reduce_gammas()
+
+chain = (ubar('x', 'a') * gc.DiracGamma('5', 'a', 'b') * gc.DiracGamma('5', 'b', 'c') * gc.DiracGamma(r'\mu', 'c', 'd') * gc.DiracGamma(r'\mu', 'd', 'e') * u('x', 'e')).wick().contract('spin')
+
+def pion(x):
+    a, b = f'a_{x}', f'b_{x}'
+    return ubar(x, a) * gc.DiracGamma('5', a, b) * u(x, b)
+
+loop = (pion('x') * pion('y')).wick().contract('spin')
+open_chains = (pion('x') * pion('y')).wick()
+
+# hermiticity merges at least the terms merged without it; the two orientations
+# of the triangle are complex conjugates and stay separate terms
+triangle = (pion('x') * pion('y') * pion('z')).wick().contract('spin')
+exchange = gc.ExchangeSymmetry(pos=['x', 'y'])
+
+# neighbouring reoriented propagators get distinct g_5 labels: the rewrite
+# commutes with contract('spin')
+def density(x):
+    return ubar(x, f'a_{x}') * u(x, f'a_{x}')
+
+densities = (density('x') * density('y') * density('z')).wick()
+contracted_first = str(gc.gamma5_hermiticity(densities.contract('spin')).reduce_gammas())
+
+# dummy labels of the inserted g_5 never draw from the user namespace
+with gc.Namespace('hermiticity') as ns:
+    hermitian = loop.simplify(gc.ExchangeSymmetry(pos=['x', 'y']), hermiticity=True).simplify(hermiticity=True)
+    rewritten = str(gc.gamma5_hermiticity(open_chains))
+    first = ns.var()
+
+tests = {
+    r'( +4 * \delta_{\mu\nu} )': trace(r'\mu', r'\nu'),
+    r'( +4 * \delta_{\mu\nu} * \delta_{\rho\sigma}-4 * \delta_{\mu\rho} * \delta_{\nu\sigma}+4 * \delta_{\mu\sigma} * \delta_{\nu\rho} )': trace(r'\mu', r'\nu', r'\rho', r'\sigma'),
+    '( -32 )': trace(r'\mu', r'\nu', r'\mu', r'\nu'),
+    r'( -4 * \epsilon_{\mu\nu\rho\sigma} )': trace('5', r'\nu', r'\mu', r'\rho', r'\sigma'),
+    '0': trace('5', r'\mu', r'\nu'),
+    '( -16 )': trace('5', r'\mu', '5', r'\mu'),
+    r'( -4 * \mathrm{Tr}_\mathrm{spin} \big[S_{u}(x, x) \big] )': chain.reduce_gammas(),
+    r'( +\mathrm{Tr}_\mathrm{spin} \big[S_{u}(x, x) * \gamma_{5} \big] * \mathrm{Tr}_\mathrm{spin} \big[S_{u}(y, y) * \gamma_{5} \big]- * \mathrm{Tr}_\mathrm{spin} \big[S_{u}(x, y) * S_{u}^\dagger(x, y) \big] )': hermitian,
+    str(hermitian): gc.gamma5_hermiticity(loop),
+    'x_{hermiticity,1}': first,
+    rewritten: gc.gamma5_hermiticity(open_chains),
+    '[]': ((loop + gc.gamma5_hermiticity(loop)).simplify(hermiticity=True) - gc.CNumber(2) * hermitian).simplify().factors,
+    '[4, 4]': [len(triangle.simplify(exchange)), len(triangle.simplify(exchange, hermiticity=True))],
+    contracted_first: gc.gamma5_hermiticity(densities).contract('spin').reduce_gammas(),
+    str(gc.gamma5_hermiticity(densities).contract('spin').reduce_gammas()): densities.simplify(hermiticity=True).contract('spin').reduce_gammas(),
+    '[1, 3, 15]': [len(gc.trace_table(n)) for n in (2, 4, 6)],
+}
+
+def test_dirac():
+    for key, value in tests.items():
+        assert key == str(value)
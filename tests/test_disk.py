@@ -0,0 +1,47 @@
+import os
+import giancarlo as gc
+
+u, ubar = gc.SpinorField('u')
+d, dbar = gc.SpinorField('d')
+
+def current(q, qbar, x, mu):
+    a, b = f'a_{x}', f'b_{x}'
+    return qbar(x, a) * gc.DiracGamma(mu, a, b) * q(x, b)
+
+def J(x, mu):
+    return gc.CNumber(1, 2) * (current(u, ubar, x, mu) - current(d, dbar, x, mu))
+
+isospin = {'S_{u}': 'S', 'S_{d}': 'S'}
+expr = J('x', r'\mu') * J('y', r'\nu') * current(u, ubar, 'z', r'\alpha')
+memory = expr.wick().contract('spin').replace(isospin).simplify()
+hermitian = expr.wick().contract('spin').replace(isospin).simplify(hermiticity=True)
+
+with gc.DiskSum(shards=4, batch=5) as disk:
+    disk.wick_from(expr)
+    nterms = len(disk)
+    contracted = disk.contract('spin').replace(isospin)
+    simplified = contracted.simplify()
+    nsimplified = len(simplified)
+    difference = simplified.sum().simplify() - memory
+    nhermitian = len(contracted.simplify(hermiticity=True, workers=2))
+    # the intermediate sums are removed with disk
+    paths = [disk.path, contracted.path, simplified.path]
+with expr.wick().spill(shards=4) as disk:
+    spilled = len(disk)
+
+# same topology, different flavour: shards follow the buckets of simplify
+loops = [(qbar('x', 's') * q('x', 's')).wick().factors[0] for q, qbar in ((u, ubar), (d, dbar))]
+with gc.DiskSum() as disk:
+    flavours = len({disk.shard(t) for t in loops})
+
+tests = {
+    str([12, len(expr.wick())]): [nterms, spilled],
+    str([len(memory), len(hermitian)]): [nsimplified, nhermitian],
+    '0': difference,
+    '[False, False, False]': [os.path.exists(p) for p in paths],
+    '2': flavours,
+}
+
+def test_disk():
+    for key, value in tests.items():
+        assert key == str(value)
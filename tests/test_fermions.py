@@ -0,0 +1,25 @@
+import giancarlo as gc
+
+psi, psibar = gc.SpinorField(r'\psi')
+q, qbar = gc.QuarkField('q')
+
+def current(x, mu):
+    a, b = gc.default.var(), gc.default.var()
+    return psibar(x, a) * gc.DiracGamma(mu, a, b) * psi(x, b)
+
+def pseudoscalar(x):
+    a, b, c = gc.default.var(), gc.default.var(), gc.default.var()
+    return qbar(x, a, c) * gc.DiracGamma('5', a, b) * q(x, b, c)
+
+chain = (psi('p', 's_a') * current('x', r'\mu') * psibar('q', 's_b')).wick()
+pp = (pseudoscalar('x') * pseudoscalar('y')).wick()
+
+tests = {
+    r'( - * S_{\psi}(y, x)(s_b, s_a) )': (psibar('x', 's_a') * psi('y', 's_b')).wick(),
+    r'( +\big[S_{\psi}(p, x) * \gamma_{\mu} * S_{\psi}(x, q) \big](s_a,s_b)- * \big[S_{\psi}(p, q) \big](s_a,s_b) * \mathrm{Tr}_\mathrm{spin} \big[S_{\psi}(x, x) * \gamma_{\mu} \big] )': chain.contract('spin'),
+    str(pp.contract('spin').contract('color')): pp.contract('spin', 'color'),
+}
+
+def test_fermions():
+    for key, value in tests.items():
+        assert key == str(value)
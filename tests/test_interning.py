@@ -0,0 +1,50 @@
+import operator
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+import giancarlo as gc
+
+psi, psibar = gc.SpinorField(r'\psi')
+def current(x, mu):
+    a, b = f'a_{x}', f'b_{x}'
+    return psibar(x, a) * gc.DiracGamma(mu, a, b) * psi(x, b)
+
+corr = (current('x', r'\mu') * current('y', r'\nu')).wick()
+props = [f for t in corr for f in t.data]
+contracted = corr.contract('spin')
+traces = [f for t in contracted for f in t.data]
+replaced = contracted.replace({r'S_{\psi}': 'S'})
+
+tests = {
+    '[6, 8]': [len(set(map(id, props))), len(props)],
+    '[3, 3]': [len(set(map(id, traces))), len(traces)],
+    str(contracted): contracted.replace({}),
+    r'S_{\psi}(x, y)(b_x, a_y)': [p for p in props if p['pos'] == (gc.Label('x'), gc.Label('y'))][0],
+    r'S(x, y)(b_x, a_y)': [p for p in props if p['pos'] == (gc.Label('x'), gc.Label('y'))][0].replace({r'S_{\psi}': 'S'}),
+    r'x \mu': ' '.join(f'{label}' for label in [gc.Label('x'), pickle.loads(pickle.dumps(gc.Label(r'\mu')))]),
+    "('x', 'y')": [p for p in props if p['pos'] == (gc.Label('x'), gc.Label('y'))][0]['pos'],
+}
+
+def test_interning():
+    for key, value in tests.items():
+        assert key == str(value)
+    assert psi('x', 'a') is psi('x', 'a')
+    assert not psi('x', 'a') is psi('y', 'a')
+    assert gc.Label(r'\mu') is gc.Label(r'\mu') and isinstance(operator.index(gc.Label('x')), int)
+    assert all(pickle.loads(pickle.dumps(f)) is f for f in props + traces)
+
+def test_label():
+    # strings become labels where they enter, a label is never equal to one
+    pos = [p for p in props if p['pos'] == (gc.Label('x'), gc.Label('y'))][0]['pos']
+    assert pos != ('x', 'y') and pos == tuple(map(gc.Label.of, ('x', 'y')))
+    # unused labels leave the table and give their integer to the next name
+    x = gc.Label('x')
+    unused = int(gc.Label('unused label'))
+    assert not 'unused label' in gc.Label.table
+    assert int(gc.Label('next label')) == unused and gc.Label('x') is x
+
+def test_threads():
+    # threads building the same new nodes get the same objects
+    build = lambda i: [psi(f'thread {j}', 'a') for j in range(200)]
+    with ThreadPoolExecutor(8) as pool:
+        out = list(pool.map(build, range(8)))
+    assert all(all(a is b for a, b in zip(out[0], nodes)) for nodes in out)
@@ -0,0 +1,21 @@
+import giancarlo as gc
+
+def build(name):
+    with gc.Namespace(name):
+        psi, psibar = gc.SpinorField(r'\psi')
+        a = gc.default.var()
+        return psi('x', a), psibar('y', a)
+
+a1, a2, b = build('a'), build('a'), build('b')
+
+tests = {
+    r"\psi(x, x_{a,1})": a1[0],
+    r"('a', 1)": a1[0].id,
+    r"True": str(a1) == str(a2) and a1[0].id == a2[0].id,
+    r"( - * S_{\psi}(x, y)(x_{a,1}, x_{a,1}) )": (a1[1] * a1[0]).wick(),
+    r"0": (a1[1] * b[0]).wick(),
+}
+
+def test_namespace():
+    for key, value in tests.items():
+        assert key == str(value)
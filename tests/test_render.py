@@ -0,0 +1,38 @@
+import io
+import giancarlo as gc
+from giancarlo.algebra import Sum
+from giancarlo.utils import default
+
+u, ubar = gc.QuarkField('u')
+
+def pion(x):
+    a, b, c = f'a_{x}', f'b_{x}', f'c_{x}'
+    return ubar(x, a, c) * gc.DiracGamma('5', a, b) * u(x, b, c)
+
+res = pion('x') * pion('y')
+res = res.wick().contract('spin')
+trace = res.factors[0].factors[-1]
+prop = trace.factors[0]
+
+plain = io.StringIO()
+nplain = res.write(plain)
+latex = io.StringIO()
+res.write(latex, latex=True)
+verbose = dict(default.verbose)
+str(res)
+
+tests = {
+    r'S_{u}(y, y)(b_y, a_y)': prop.render(('color',)),
+    r'S_{u}(y, y)': prop.render(('color', 'spin')),
+    r'\mathrm{Tr}_\mathrm{spin} \big[S_{u}(y, y)(c_y, c_y) * \gamma_{5} \big]': trace,
+    'True': prop.render() is prop.render(),
+    '2': nplain,
+    str(res)[2:-2].replace(']- *', ']\n- *') + '\n': plain.getvalue(),
+    r'& -\,\mathrm{Tr}_\mathrm{spin} \big[S_{u}(x, y)(c_x, c_y)\,\gamma_{5}\,S_{u}(y, x)(c_y, c_x)\,\gamma_{5} \big] \\': latex.getvalue().split('\n')[2],
+    str(verbose): default.verbose,
+    '0': Sum([]).render(),
+}
+
+def test_render():
+    for key, value in tests.items():
+        assert key == str(value)
@@ -1,3 +1,5 @@
+from collections import Counter
+from itertools import permutations
 import giancarlo as gc
 
 phir = gc.RealScalarField(r'\phi')
@@ -20,9 +22,32 @@ tests = {
     r'( +S_{\phi}(y, x) )': (phidag('x') * phi('y')).wick(),
     r'( +S_{\phi}(x, y) )': (phi('x') * phidag('y')).wick(),
     r'( +S_{\phi}(x, x) * S_{\phi}(y, y)+S_{\phi}(x, y) * S_{\phi}(y, x) )': (op('x') * op('y')).wick(),
-    r'( +S_{A}(x, y)(\mu, \nu) )': (A('x', r'\mu') * A('y', r'\nu')).wick()
+    r'( +S_{A}(x, y)(\mu, \nu) )': (A('x', r'\mu') * A('y', r'\nu')).wick(),
+    r'( +S_{\phi}(x, y)-\frac{1}{2} * \lambda * S_{\phi}(x, z_{1}) * S_{\phi}(y, z_{1}) * S_{\phi}(z_{1}, z_{1})+\frac{1}{4} * \lambda^2 * S_{\phi}(x, z_{1}) * S_{\phi}(y, z_{1}) * S_{\phi}(z_{1}, z_{2}) * S_{\phi}(z_{1}, z_{2}) * S_{\phi}(z_{2}, z_{2})+\frac{1}{4} * \lambda^2 * S_{\phi}(x, z_{1}) * S_{\phi}(y, z_{2}) * S_{\phi}(z_{1}, z_{1}) * S_{\phi}(z_{1}, z_{2}) * S_{\phi}(z_{2}, z_{2})+\frac{1}{6} * \lambda^2 * S_{\phi}(x, z_{1}) * S_{\phi}(y, z_{2}) * S_{\phi}(z_{1}, z_{2}) * S_{\phi}(z_{1}, z_{2}) * S_{\phi}(z_{1}, z_{2}) )': gc.perturbative(phir('x') * phir('y'), phi4, 2),
+    r'( +S_{\phi}(x, y)-\frac{1}{2} * \lambda * S_{\phi}(x, z_{1}) * S_{\phi}(y, z_{1}) * S_{\phi}(z_{1}, z_{1}) )': gc.perturbative(phir('x') * phir('y'), phi4, 1, orbits=False).simplify(),
+    r'( +S_{\phi}(x, x)-\frac{1}{8} * \lambda * S_{\phi}(x, x) * S_{\phi}(z_{1}, z_{1}) * S_{\phi}(z_{1}, z_{1})-\frac{1}{2} * \lambda * S_{\phi}(x, z_{1}) * S_{\phi}(x, z_{1}) * S_{\phi}(z_{1}, z_{1}) )': gc.perturbative(op_r('x'), phi4, 1, connected=False),
 }
 
 def test_scalar():
     for key, value in tests.items():
-        assert key == str(value)
\ No newline at end of file
+        assert key == str(value)
+
+def graphs(expr, vertices):
+    # coefficient of each graph up to a relabelling of the vertices
+    out = Counter()
+    for t in expr.factors:
+        edges = [tuple(map(str, f['pos'])) for f in t.data]
+        key = min(
+            tuple(sorted(tuple(sorted(dict(zip(vertices, p)).get(x, x) for x in e)) for e in edges))
+            for p in permutations(vertices))
+        c = t.prefactor.cnum[0].value if t.prefactor.cnum else 1
+        out[key, tuple(map(str, t.symb))] += c
+    return out
+
+def test_perturbative_order3():
+    # the orbits give the coefficients of the plain contraction, graph by graph
+    vertices = ['z_{1}', 'z_{2}', 'z_{3}']
+    expr = phir('x') * phir('y')
+    orbits = gc.perturbative(expr, phi4, 3)
+    assert len(orbits) == 15
+    assert graphs(orbits, vertices) == graphs(gc.perturbative(expr, phi4, 3, orbits=False), vertices)
@@ -0,0 +1,37 @@
+import giancarlo as gc
+from giancarlo.algebra import invariants
+
+u, ubar = gc.SpinorField('u')
+d, dbar = gc.SpinorField('d')
+
+def current(q, qbar, x, mu):
+    a, b = gc.default.var(), gc.default.var()
+    return qbar(x, a) * gc.DiracGamma(mu, a, b) * q(x, b)
+
+up = (current(u, ubar, 'x', r'\mu') * current(u, ubar, 'y', r'\nu')).wick().contract('spin')
+down = (current(d, dbar, 'x', r'\mu') * current(d, dbar, 'y', r'\nu')).wick().contract('spin')
+isospin = {'S_{u}': 'S', 'S_{d}': 'S'}
+
+# contracting an index that no factor carries leaves the terms as they are
+phi, phidag = gc.ComplexScalarField(r'\phi')
+A = gc.PhotonField()
+J = lambda x, mu: phidag(x) * A(x, mu) * phi(x)
+scalar = (phi('x') * J('z1', r'\alpha') * J('z2', r'\beta') * phidag('y')).wick()
+exchange = gc.ExchangeSymmetry(pos=['z1', 'z2'], lorentz=[r'\alpha', r'\beta'])
+
+tests = {
+    r'( +\mathrm{Tr}_\mathrm{spin} \big[S_{u}(x, x) * \gamma_{\mu} \big] * \mathrm{Tr}_\mathrm{spin} \big[S_{u}(y, y) * \gamma_{\nu} \big]- * \mathrm{Tr}_\mathrm{spin} \big[S_{u}(x, y) * \gamma_{\nu} * S_{u}(y, x) * \gamma_{\mu} \big] )': up.simplify(),
+    str((up - down).simplify()): up.simplify() - down.simplify(),
+    str((up + down).simplify()): up.simplify() + down.simplify(),
+    str(up.simplify()): up.simplify().simplify(),
+    '0': up.replace(isospin).simplify() - down.replace(isospin).simplify(),
+    'True': all(t.contract('spin') is t for t in scalar.factors),
+    str(scalar.simplify(exchange)): scalar.contract('spin').simplify(exchange),
+    '4': len({invariants(f.data) for f in (up + down).factors}),
+}
+
+def test_simplify():
+    for key, value in tests.items():
+        assert key == str(value)
+    # the buckets merged by two processes give the serial result
+    assert str((up + down).simplify(workers=2)) == str((up + down).simplify())
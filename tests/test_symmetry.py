@@ -0,0 +1,45 @@
+import giancarlo as gc
+
+phi, phidag = gc.ComplexScalarField(r'\phi')
+A = gc.PhotonField()
+
+def Jgamma(x, mu):
+    return phidag(x) * A(x, mu) * phi(x)
+
+prop = phi('x') * Jgamma('z1', r'\alpha') * Jgamma('z2', r'\beta') * phidag('y')
+
+q, qbar = gc.SpinorField('u')
+
+def J(x, mu, a, b):
+    return qbar(x, a) * gc.DiracGamma(mu, a, b) * q(x, b)
+
+fixed = ['x', 'y', 's', 't']
+chain = qbar('x', 's') * J('z1', r'\alpha', 'a1', 'b1') * J('z2', r'\beta', 'a2', 'b2') * q('y', 't')
+
+phir = gc.RealScalarField(r'\phi')
+
+def phi4(z):
+    return phir(z) * phir(z) * phir(z) * phir(z)
+
+tests = {
+    r"[LabelSymmetry({'pos': {'z1': 'z2', 'z2': 'z1'}, 'lorentz': {'\\alpha': '\\beta', '\\beta': '\\alpha'}})]": prop.symmetries(fixed=['x', 'y']),
+    '[]': prop.symmetries(fixed=['z1']),
+    r'( +2 * S_{\phi}(x, z1) * S_{A}(z1, z2)(\alpha, \beta) * S_{\phi}(z1, z2) * S_{\phi}(z2, y)+2 * S_{\phi}(x, z1) * S_{A}(z1, z2)(\alpha, \beta) * S_{\phi}(z1, y) * S_{\phi}(z2, z2)+S_{\phi}(x, y) * S_{A}(z1, z2)(\alpha, \beta) * S_{\phi}(z1, z1) * S_{\phi}(z2, z2)+S_{\phi}(x, y) * S_{A}(z1, z2)(\alpha, \beta) * S_{\phi}(z1, z2) * S_{\phi}(z2, z1) )': prop.wick(orbits=True, fixed=['x', 'y']),
+    '6': len(prop.wick()),
+    '4': len(prop.wick(orbits=True)),
+    r'( -2 * \gamma_{\alpha}(a1, b1) * S_{u}(z1, x)(b1, s) * \gamma_{\beta}(a2, b2) * S_{u}(z2, z1)(b2, a1) * S_{u}(y, z2)(t, a2)+2 * \gamma_{\alpha}(a1, b1) * S_{u}(z1, x)(b1, s) * \gamma_{\beta}(a2, b2) * S_{u}(z2, z2)(b2, a2) * S_{u}(y, z1)(t, a1)- * \gamma_{\alpha}(a1, b1) * S_{u}(z1, z1)(b1, a1) * \gamma_{\beta}(a2, b2) * S_{u}(z2, z2)(b2, a2) * S_{u}(y, x)(t, s)+\gamma_{\alpha}(a1, b1) * S_{u}(z1, z2)(b1, a2) * \gamma_{\beta}(a2, b2) * S_{u}(z2, z1)(b2, a1) * S_{u}(y, x)(t, s) )': chain.wick(orbits=True, fixed=fixed),
+    # the exchange of two fermions is odd, the orbits cancel
+    '0': (q('z1', 's') * q('z2', 's') * qbar('x', 's') * qbar('y', 's')).wick(orbits=True, fixed=['x', 'y']),
+}
+
+def test_symmetry():
+    for key, value in tests.items():
+        assert key == str(value)
+
+def test_orbits_phi4():
+    # identical fields at a vertex are counted, not permuted by the group: with
+    # the vertices fixed every orbit is one term of the plain contraction
+    expr = phir('x') * phir('y') * phi4('z1') * phi4('z2')
+    fixed = ['x', 'y', 'z1', 'z2']
+    assert str((expr.wick(orbits=True, fixed=fixed).simplify() - expr.wick().simplify()).simplify()) == '0'
+    assert len((expr * phi4('z3')).wick(orbits=True, fixed=['x', 'y'])) == 23
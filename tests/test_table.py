@@ -0,0 +1,24 @@
+import giancarlo as gc
+
+phi = gc.RealScalarField(r'\phi')
+psi, psibar = gc.SpinorField(r'\psi')
+
+expr = psibar('x', 'a') * phi('x') * psi('y', 'b') * phi('y')
+table = expr.table()
+
+tests = {
+    '[0 1 0 1]': table.id,
+    '[ True False False False]': table.anti,
+    '[False  True False  True]': table.boson,
+    '[[False, False, False, False], [False, False, False, True], [True, False, False, False], [False, True, False, False]]': table.compatible().tolist(),
+    '[([(1, 3), (2, 0)], -1)]': gc.wick.wick_table(table),
+    '[]': gc.wick.wick_table((psibar('x', 'a') * phi('x')).table()),
+    r'( - * S_{\phi}(x, y) * S_{\psi}(y, x)(b, a) )': expr.wick(),
+}
+
+def test_table():
+    for key, value in tests.items():
+        assert key == str(value)
+    # real fields are the bosons here, the position column holds the labels
+    assert (table.real == table.boson).all()
+    assert (table.index['pos'] == [int(gc.Label(x)) for x in 'xxyy']).all()
@@ -0,0 +1,51 @@
+import os
+import re
+import giancarlo as gc
+
+phi = gc.RealScalarField(r'\phi')
+psi, psibar = gc.SpinorField(r'\psi')
+
+def current(x, mu):
+    a, b = gc.default.var(), gc.default.var()
+    return psibar(x, a) * gc.DiracGamma(mu, a, b) * psi(x, b)
+
+scalars = (phi('x') * phi('x') * phi('y') * phi('y')).wick()
+fermions = (current('x', r'\mu') * current('y', r'\nu')).wick().contract('spin')
+chi = gc.RealScalarField(r'\chi')
+single = (phi('x') * phi('y')).wick().unique_topologies()
+unique = (scalars + gc.CNumber(2) * (chi('x') * chi('x') * chi('y') * chi('y')).wick()).unique_topologies()
+symbolic = (gc.CNumber(1, 2) * scalars + gc.Symbol('g') * (chi('x') * chi('x') * chi('y') * chi('y')).wick()).unique_topologies()
+
+tests = {
+    "[((1, (('prop', 'default'),)), (1, (('prop', 'default'),))), ((2, (('prop', 'default'), ('prop', 'default'))),)]": scalars.topologies(),
+    "[((1, (('trace', 1),)), (1, (('trace', 1),))), ((2, (('trace', 2),)),)]": fermions.topologies(),
+    "[2, 1]": [len(t.topology()) for t in fermions],
+    "{((1, (('trace', 1),)), (1, (('trace', 1),))): [0], ((2, (('trace', 2),)),): [1]}": gc.Topology.group(fermions),
+    "[2, 2]": [len(u) for u in unique],
+    "[((('x', 'x'), 'default'), (('y', 'y'), 'default')), ((('x', 'y'), 'default'), (('x', 'y'), 'default'))]": [u.topology.signature for u in unique],
+    "['2 terms : 3', '2 terms : 6']": [str(u) for u in unique],
+    # a unit coefficient is printed, also in the title of the diagram
+    "['1 term : 1']": [str(u) for u in single],
+    '1 term : $1$': single[0].diagram()[1],
+    # prefactors with symbols are summed symbol by symbol
+    r"['2 terms : ( +\\frac{1}{2}+g )', '2 terms : ( +1+2 * g )']": [str(u) for u in symbolic],
+}
+
+def test_topology():
+    for key, value in tests.items():
+        assert key == str(value)
+
+def test_draw_unit_coefficient(tmp_path):
+    (phi('x') * phi('y')).wick().draw(str(tmp_path / 'unit.pdf'), unique=True, usetex=False)
+    assert (tmp_path / 'unit.pdf').exists()
+
+def test_draw_workers(tmp_path):
+    # pdf pages stay vector graphics with workers, other formats are split in pages
+    path = str(tmp_path / 'pages.pdf')
+    assert scalars.draw(path, per_page=1, usetex=False, workers=2) == [path]
+    with open(path, 'rb') as f:
+        pdf = f.read()
+    assert len(re.findall(rb'/Type /Page\b(?!s)', pdf)) == 2 and not b'/Subtype /Image' in pdf
+    paths = scalars.draw(str(tmp_path / 'pages.png'), per_page=1, usetex=False, workers=2)
+    assert [os.path.basename(p) for p in paths] == ['pages-000.png', 'pages-001.png']
+    assert all(os.path.exists(p) for p in paths)
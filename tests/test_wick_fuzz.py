@@ -0,0 +1,13 @@
+from giancarlo.fuzz import fuzz
+
+records = fuzz(n=40, seed=46, max_pairs=4)
+
+tests = {
+    '40': len(records),
+    'True': any(r['terms'] > 1 for r in records),
+    "['wick_fields_fast', 'wick_fields_fast_v0', 'wick_fields_fast_v1']": sorted(records[0]['ratio']),
+}
+
+def test_wick_fuzz():
+    for key, value in tests.items():
+        assert key == str(value)